@@ -0,0 +1,474 @@
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import hnswlib
+except ImportError:  # hnsw 백엔드는 선택 사항
+    hnswlib = None
+
+# 검색 결과: 질의별 (lab row 인덱스, 점수) 배열 쌍
+SearchResult = Tuple[np.ndarray, np.ndarray]
+
+COMPRESSION_MODES = ("float16", "int8", "pca")
+# 압축 벡터 스캔 시 한 번에 float32로 풀어 계산하는 행 수
+SCAN_BLOCK_ROWS = 16384
+
+
+def select_top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` largest scores, best first (partial sort)"""
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        top = np.argpartition(scores, n - k)[n - k:]
+    else:
+        top = np.arange(n)
+    return top[np.argsort(-scores[top], kind='stable')]
+
+
+class VectorIndex:
+    """Top-k inner-product search over normalized lab embeddings"""
+
+    name = "base"
+    exact = False
+
+    def __init__(self, embeddings: np.ndarray):
+        self.embeddings = embeddings
+
+    def __len__(self) -> int:
+        return int(self.embeddings.shape[0])
+
+    def search(self, queries: np.ndarray, k: int) -> List[SearchResult]:
+        raise NotImplementedError
+
+    def score_all(self, queries: np.ndarray) -> np.ndarray:
+        """Exact scores of every lab for each query"""
+        return np.atleast_2d(queries).astype(np.float32, copy=False) @ self.embeddings.T
+
+    def score_rows(self, query: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Exact scores of the given lab rows for one query"""
+        return np.asarray(self.embeddings[rows], dtype=np.float32) @ query
+
+    def search_rows(self, queries: np.ndarray, rows: np.ndarray, k: int) -> List[SearchResult]:
+        """Exact top-``k`` among the given lab rows only; cost scales with ``len(rows)``"""
+        queries = np.atleast_2d(queries).astype(np.float32, copy=False)
+        k = min(k, len(rows))
+        scores = queries @ np.asarray(self.embeddings[rows], dtype=np.float32).T
+        results = []
+        for row in scores:
+            top = select_top_k(row, k)
+            results.append((rows[top], row[top]))
+        return results
+
+    def set_recall(self, value: int) -> None:
+        """Adjust the recall/latency knob (ignored by exact backends)"""
+
+
+class BruteForceIndex(VectorIndex):
+    """Exact search: scores every lab with one matrix multiply"""
+
+    name = "brute"
+    exact = True
+
+    def search(self, queries: np.ndarray, k: int) -> List[SearchResult]:
+        queries = np.atleast_2d(queries).astype(np.float32, copy=False)
+        k = min(k, len(self))
+        scores = queries @ self.embeddings.T
+        results = []
+        for row in scores:
+            top = select_top_k(row, k)
+            results.append((top, row[top]))
+        return results
+
+
+class HNSWIndex(VectorIndex):
+    """Graph-based ANN via hnswlib; ``ef_search`` trades recall for latency"""
+
+    name = "hnsw"
+
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        M: int = 32,
+        ef_construction: int = 200,
+        ef_search: int = 64,
+        path: Optional[Path] = None
+    ):
+        super().__init__(embeddings)
+        dim = int(embeddings.shape[1])
+        self.index = hnswlib.Index(space='ip', dim=dim)
+
+        if path is not None and path.exists():
+            self.index.load_index(str(path), max_elements=len(self))
+            logger.info(f"Loaded HNSW index from {path}")
+        else:
+            logger.info(f"Building HNSW index over {len(self)} labs (M={M}, ef_construction={ef_construction})")
+            self.index.init_index(max_elements=len(self), ef_construction=ef_construction, M=M)
+            self.index.add_items(np.asarray(embeddings, dtype=np.float32), np.arange(len(self)))
+            if path is not None:
+                try:
+                    self.index.save_index(str(path))
+                except OSError as e:
+                    logger.warning(f"Could not persist HNSW index: {str(e)}")
+        self.set_recall(ef_search)
+
+    def set_recall(self, value: int) -> None:
+        self.ef_search = int(value)
+        self.index.set_ef(self.ef_search)
+
+    def search(self, queries: np.ndarray, k: int) -> List[SearchResult]:
+        queries = np.atleast_2d(queries).astype(np.float32, copy=False)
+        k = min(k, len(self))
+        if self.ef_search < k:
+            self.index.set_ef(k)
+        labels, distances = self.index.knn_query(queries, k=k)
+        if self.ef_search < k:
+            self.index.set_ef(self.ef_search)
+        # ip 공간의 거리는 1 - 내적
+        return [(labels[i].astype(np.int64), 1.0 - distances[i]) for i in range(len(labels))]
+
+
+class IVFIndex(VectorIndex):
+    """Inverted-file index: spherical k-means cells, ``nprobe`` cells scanned per query"""
+
+    name = "ivf"
+
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        path: Optional[Path] = None,
+        train_size: int = 50000,
+        iterations: int = 10,
+        seed: int = 0
+    ):
+        super().__init__(embeddings)
+        if path is not None and path.exists():
+            data = np.load(path)
+            self.centroids = data["centroids"]
+            self.order = data["order"]
+            self.offsets = data["offsets"]
+            logger.info(f"Loaded IVF index from {path}")
+        else:
+            nlist = nlist or max(1, int(np.sqrt(len(self))))
+            logger.info(f"Training IVF index over {len(self)} labs (nlist={nlist})")
+            self._train(nlist, train_size, iterations, seed)
+            if path is not None:
+                try:
+                    with open(path, 'wb') as f:
+                        np.savez(f, centroids=self.centroids, order=self.order, offsets=self.offsets)
+                except OSError as e:
+                    logger.warning(f"Could not persist IVF index: {str(e)}")
+        self.set_recall(nprobe)
+
+    def _train(self, nlist: int, train_size: int, iterations: int, seed: int) -> None:
+        rng = np.random.default_rng(seed)
+        n = len(self)
+        sample = self.embeddings
+        if n > train_size:
+            sample = self.embeddings[np.sort(rng.choice(n, train_size, replace=False))]
+        sample = np.asarray(sample, dtype=np.float32)
+
+        centroids = sample[rng.choice(len(sample), min(nlist, len(sample)), replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # 비어 있는 셀은 이전 중심을 유지
+            empty = norms[:, 0] == 0
+            sums[empty] = centroids[empty]
+            norms[empty] = 1.0
+            centroids = sums / norms
+
+        # 전체 벡터를 셀에 배정하고 CSR 형태(order + offsets)로 저장
+        assign = np.empty(n, dtype=np.int64)
+        for start in range(0, n, 65536):
+            block = np.asarray(self.embeddings[start:start + 65536], dtype=np.float32)
+            assign[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        self.centroids = centroids.astype(np.float32)
+        self.order = np.argsort(assign, kind='stable')
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=len(centroids)))])
+
+    def set_recall(self, value: int) -> None:
+        self.nprobe = max(1, min(int(value), len(self.centroids)))
+
+    def search(self, queries: np.ndarray, k: int) -> List[SearchResult]:
+        queries = np.atleast_2d(queries).astype(np.float32, copy=False)
+        k = min(k, len(self))
+        cell_scores = queries @ self.centroids.T
+        results = []
+        for q, row in zip(queries, cell_scores):
+            cells = select_top_k(row, self.nprobe)
+            candidates = np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in cells])
+            scores = self.embeddings[candidates] @ q
+            top = select_top_k(scores, k)
+            results.append((candidates[top], scores[top]))
+        return results
+
+
+class CompressedIndex(VectorIndex):
+    """Flat scan over compressed embeddings, optionally rescored exactly.
+
+    Modes:
+        float16  half-precision copy of the embeddings
+        int8     per-dimension symmetric scalar quantization
+        pca      float32 projection onto the top ``pca_dim`` principal axes
+
+    The first pass scores every lab on the compressed codes (decoded block
+    by block); with ``rescore > 0`` the best ``k * rescore`` candidates are
+    rescored against the float32 matrix, which stays memory-mapped and is
+    only touched for those rows. Codes are written next to the bundle as
+    ``.npy`` files so worker processes can map them too.
+    """
+
+    exact = False
+
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        mode: str,
+        rescore: int = 4,
+        pca_dim: int = 256,
+        path: Optional[Path] = None,
+        train_size: int = 20000,
+        seed: int = 0
+    ):
+        super().__init__(embeddings)
+        if mode not in COMPRESSION_MODES:
+            raise ValueError(f"Unknown compression mode '{mode}'")
+        self.mode = mode
+        self.name = mode
+        self.rescore = max(0, int(rescore))
+        self.scale: Optional[np.ndarray] = None
+        self.mean: Optional[np.ndarray] = None
+        self.components: Optional[np.ndarray] = None
+
+        params_path = path.with_suffix(".params.npz") if path is not None else None
+        if path is not None and path.exists() and (mode == "float16" or params_path.exists()):
+            self.codes = np.load(path, mmap_mode='r')
+            if params_path is not None and params_path.exists():
+                params = np.load(params_path)
+                self.scale = params.get("scale")
+                self.mean = params.get("mean")
+                self.components = params.get("components")
+            logger.info(f"Loaded {mode} embeddings from {path}")
+        else:
+            logger.info(f"Compressing {len(self)} lab embeddings ({mode})")
+            self.codes = self._compress(pca_dim, train_size, seed)
+            if path is not None:
+                self._save(path, params_path)
+
+    def _compress(self, pca_dim: int, train_size: int, seed: int) -> np.ndarray:
+        n, dim = self.embeddings.shape
+        if self.mode == "float16":
+            return self._map_blocks(lambda block: block.astype(np.float16), np.float16, dim)
+
+        if self.mode == "int8":
+            max_abs = np.zeros(dim, dtype=np.float32)
+            for start in range(0, n, SCAN_BLOCK_ROWS):
+                block = np.abs(np.asarray(self.embeddings[start:start + SCAN_BLOCK_ROWS], dtype=np.float32))
+                np.maximum(max_abs, block.max(axis=0), out=max_abs)
+            self.scale = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+            return self._map_blocks(
+                lambda block: np.clip(np.rint(block / self.scale), -127, 127).astype(np.int8), np.int8, dim
+            )
+
+        # pca: 표본으로 주성분을 구한 뒤 전체를 사영
+        rng = np.random.default_rng(seed)
+        sample = self.embeddings
+        if n > train_size:
+            sample = self.embeddings[np.sort(rng.choice(n, train_size, replace=False))]
+        sample = np.asarray(sample, dtype=np.float32)
+        self.mean = sample.mean(axis=0)
+        _, _, vt = np.linalg.svd(sample - self.mean, full_matrices=False)
+        self.components = np.ascontiguousarray(vt[:min(pca_dim, vt.shape[0])], dtype=np.float32)
+        return self._map_blocks(
+            lambda block: (block - self.mean) @ self.components.T, np.float32, self.components.shape[0]
+        )
+
+    def _map_blocks(self, fn, dtype, width: int) -> np.ndarray:
+        n = len(self)
+        out = np.empty((n, width), dtype=dtype)
+        for start in range(0, n, SCAN_BLOCK_ROWS):
+            out[start:start + SCAN_BLOCK_ROWS] = fn(np.asarray(self.embeddings[start:start + SCAN_BLOCK_ROWS], dtype=np.float32))
+        return out
+
+    def _save(self, path: Path, params_path: Path) -> None:
+        try:
+            tmp_path = path.with_name(f".{path.name}.tmp")
+            with open(tmp_path, 'wb') as f:
+                np.save(f, self.codes)
+            params = {name: value for name, value in
+                      (("scale", self.scale), ("mean", self.mean), ("components", self.components))
+                      if value is not None}
+            if params:
+                with open(params_path, 'wb') as f:
+                    np.savez(f, **params)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not persist {self.mode} embeddings: {str(e)}")
+
+    def memory_bytes(self) -> int:
+        """Bytes scanned per query (codes plus decoding parameters)"""
+        extra = sum(a.nbytes for a in (self.scale, self.mean, self.components) if a is not None)
+        return int(self.codes.nbytes) + int(extra)
+
+    def approximate_scores(self, queries: np.ndarray) -> np.ndarray:
+        """First-pass scores of every lab against each query, from the codes"""
+        if self.mode == "int8":
+            projected = queries * self.scale
+        elif self.mode == "pca":
+            projected = queries @ self.components.T
+        else:
+            projected = queries
+
+        scores = np.empty((len(queries), len(self)), dtype=np.float32)
+        for start in range(0, len(self), SCAN_BLOCK_ROWS):
+            block = np.asarray(self.codes[start:start + SCAN_BLOCK_ROWS], dtype=np.float32)
+            scores[:, start:start + len(block)] = projected @ block.T
+        if self.mode == "pca":
+            # 중심화로 빠진 mean·q 항을 되돌려 코사인 유사도 범위를 유지
+            scores += (queries @ self.mean)[:, None]
+        return scores
+
+    def search(self, queries: np.ndarray, k: int) -> List[SearchResult]:
+        queries = np.atleast_2d(queries).astype(np.float32, copy=False)
+        k = min(k, len(self))
+        approx = self.approximate_scores(queries)
+        pool = min(len(self), k * self.rescore) if self.rescore else k
+        results = []
+        for q, row in zip(queries, approx):
+            candidates = select_top_k(row, pool)
+            if not self.rescore:
+                results.append((candidates, row[candidates]))
+                continue
+            # 후보 행만 float32 원본으로 다시 계산 (정렬된 순서로 읽어 mmap 지역성 확보)
+            candidates = np.sort(candidates)
+            exact = np.asarray(self.embeddings[candidates], dtype=np.float32) @ q
+            top = select_top_k(exact, k)
+            results.append((candidates[top], exact[top]))
+        return results
+
+
+def benchmark_modes(
+    embeddings: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+    modes: Tuple[str, ...] = ("float32",) + COMPRESSION_MODES,
+    rescore_factors: Tuple[int, ...] = (0, 4),
+    pca_dim: int = 256
+) -> List[Dict[str, Any]]:
+    """Memory, per-query latency and recall@k of each embedding mode against exact float32 search"""
+    queries = np.atleast_2d(queries).astype(np.float32, copy=False)
+    exact_index = BruteForceIndex(embeddings)
+    truth = [set(ids.tolist()) for ids, _ in exact_index.search(queries, k)]
+
+    def measure(index: VectorIndex) -> Tuple[float, float]:
+        latencies = []
+        hits = 0
+        for q, expected in zip(queries, truth):
+            started = time.perf_counter()
+            ids, _ = index.search(q, k)[0]
+            latencies.append(time.perf_counter() - started)
+            hits += len(expected.intersection(ids.tolist()))
+        return float(np.median(latencies)) * 1000, hits / max(1, k * len(queries))
+
+    report = []
+    for mode in modes:
+        if mode == "float32":
+            latency_ms, recall = measure(exact_index)
+            report.append({"mode": "float32", "rescore": 0, "memory_mb": embeddings.nbytes / 2 ** 20,
+                           "latency_ms": latency_ms, f"recall@{k}": recall})
+            continue
+        index = CompressedIndex(embeddings, mode, pca_dim=pca_dim)
+        for factor in rescore_factors:
+            index.rescore = factor
+            latency_ms, recall = measure(index)
+            report.append({"mode": mode, "rescore": factor, "memory_mb": index.memory_bytes() / 2 ** 20,
+                           "latency_ms": latency_ms, f"recall@{k}": recall})
+    return report
+
+
+def build_vector_index(
+    embeddings: np.ndarray,
+    backend: Optional[str] = None,
+    cache_dir: Optional[Path] = None,
+    version: Optional[str] = None
+) -> VectorIndex:
+    """Create the configured index backend, falling back to brute force.
+
+    Environment:
+        LAB_ANN_BACKEND      brute | hnsw | ivf (default: brute)
+        LAB_ANN_MIN_SIZE     catalogs smaller than this always use brute force
+        LAB_ANN_RECALL       ef_search for hnsw, nprobe for ivf
+        LAB_EMBEDDING_MODE   float32 | float16 | int8 | pca, for the flat scan (default: float32)
+        LAB_RESCORE_FACTOR   rescore k * factor candidates in float32, 0 to disable (default: 4)
+        LAB_PCA_DIM          output dimensions for pca mode (default: 256)
+    """
+    backend = (backend or os.getenv("LAB_ANN_BACKEND", "brute")).lower()
+    min_size = int(os.getenv("LAB_ANN_MIN_SIZE", "5000"))
+    recall = os.getenv("LAB_ANN_RECALL")
+
+    if backend == "brute" or len(embeddings) < min_size:
+        if backend != "brute":
+            logger.info(f"Catalog has {len(embeddings)} labs (< {min_size}), using exact search")
+        return _flat_index(embeddings, cache_dir, version)
+
+    path = None
+    if cache_dir is not None and version is not None:
+        path = Path(cache_dir) / f"{backend}-{version}.{'bin' if backend == 'hnsw' else 'npz'}"
+
+    try:
+        if backend == "hnsw":
+            if hnswlib is None:
+                logger.warning("hnswlib is not installed, falling back to exact search")
+                return BruteForceIndex(embeddings)
+            index = HNSWIndex(embeddings, path=path)
+        elif backend == "ivf":
+            index = IVFIndex(embeddings, path=path)
+        else:
+            logger.warning(f"Unknown ANN backend '{backend}', using exact search")
+            return BruteForceIndex(embeddings)
+    except Exception as e:
+        logger.error(f"Error building {backend} index: {str(e)}")
+        return BruteForceIndex(embeddings)
+
+    if recall:
+        index.set_recall(int(recall))
+    return index
+
+
+def _flat_index(embeddings: np.ndarray, cache_dir: Optional[Path], version: Optional[str]) -> VectorIndex:
+    """Exact float32 scan, or a compressed scan if LAB_EMBEDDING_MODE asks for one"""
+    mode = os.getenv("LAB_EMBEDDING_MODE", "float32").lower()
+    if mode == "float32":
+        return BruteForceIndex(embeddings)
+    if mode not in COMPRESSION_MODES:
+        logger.warning(f"Unknown embedding mode '{mode}', using float32")
+        return BruteForceIndex(embeddings)
+
+    pca_dim = int(os.getenv("LAB_PCA_DIM", "256"))
+    path = None
+    if cache_dir is not None and version is not None:
+        suffix = f"{mode}{pca_dim}" if mode == "pca" else mode
+        path = Path(cache_dir) / f"{suffix}-{version}.npy"
+    try:
+        return CompressedIndex(
+            embeddings,
+            mode,
+            rescore=int(os.getenv("LAB_RESCORE_FACTOR", "4")),
+            pca_dim=pca_dim,
+            path=path
+        )
+    except Exception as e:
+        logger.error(f"Error building {mode} embeddings: {str(e)}")
+        return BruteForceIndex(embeddings)
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Collects concurrent requests for a short window and runs them as one batch.
+
+    ``run_batch`` receives the list of submitted items and must return one
+    result per item, in order. It runs in ``executor`` so the event loop only
+    coordinates; while one batch is running the next one is being collected.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[Any]], List[Any]],
+        max_wait_ms: float = 5.0,
+        max_batch_size: int = 64,
+        executor: Optional[Executor] = None,
+        stats_window: int = 4096,
+        name: str = "batcher"
+    ):
+        self.run_batch = run_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self.executor = executor
+        self.name = name
+
+        self._pending: List[Tuple[Any, asyncio.Future, float]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # 통계: (완료 시각, 지연 시간) 및 배치 크기
+        self._completions: Deque[Tuple[float, float]] = deque(maxlen=stats_window)
+        self._batch_sizes: Deque[int] = deque(maxlen=stats_window)
+        self._started_at = time.perf_counter()
+        self.total_requests = 0
+        self.total_batches = 0
+        self.total_errors = 0
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._full = asyncio.Event()
+        self._started_at = time.perf_counter()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"{self.name} started (window={self.max_wait * 1000:.1f}ms, max_batch={self.max_batch_size})")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        for _, future, _ in self._pending:
+            if not future.done():
+                future.cancel()
+        self._pending = []
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its result"""
+        if self._task is None:
+            raise RuntimeError(f"{self.name} is not running")
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch_size:
+            self._full.set()
+        self._wakeup.set()
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            # 첫 요청 도착 후 최대 max_wait 동안 또는 배치가 찰 때까지 대기
+            if len(self._pending) < self.max_batch_size and self.max_wait > 0:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            if len(self._pending) < self.max_batch_size:
+                self._full.clear()
+            if not self._pending:
+                self._wakeup.clear()
+
+            # 이미 취소된(연결이 끊긴) 요청은 제외
+            batch = [entry for entry in batch if not entry[1].done()]
+            if not batch:
+                continue
+
+            try:
+                results = await loop.run_in_executor(
+                    self.executor, self.run_batch, [item for item, _, _ in batch]
+                )
+            except Exception as e:
+                logger.error(f"{self.name} batch failed: {str(e)}")
+                self.total_errors += len(batch)
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            now = time.perf_counter()
+            self.total_batches += 1
+            self.total_requests += len(batch)
+            self._batch_sizes.append(len(batch))
+            for (_, future, submitted), result in zip(batch, results):
+                self._completions.append((now, now - submitted))
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.perf_counter()
+        window = [(t, latency) for t, latency in self._completions if now - t <= 60.0]
+        elapsed = min(60.0, now - self._started_at)
+        latencies = np.array([latency for _, latency in self._completions]) * 1000.0
+        stats = {
+            "window_ms": self.max_wait * 1000.0,
+            "max_batch_size": self.max_batch_size,
+            "queue_depth": len(self._pending),
+            "total_requests": self.total_requests,
+            "total_batches": self.total_batches,
+            "total_errors": self.total_errors,
+            "mean_batch_size": round(float(np.mean(self._batch_sizes)), 2) if self._batch_sizes else 0.0,
+            "throughput_rps": round(len(window) / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+        if len(latencies):
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            stats.update(
+                latency_p50_ms=round(float(p50), 2),
+                latency_p95_ms=round(float(p95), 2),
+                latency_p99_ms=round(float(p99), 2)
+            )
+        return stats
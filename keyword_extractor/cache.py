@@ -0,0 +1,78 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+# 정규화된 질의 키: (전공, 정렬된 키워드 튜플)
+QueryKey = Tuple[str, Tuple[str, ...]]
+# 추천 결과 필터: (정렬된 대학 튜플, 정렬된 학과 튜플); 빈 튜플은 제한 없음
+FacetFilter = Tuple[Tuple[str, ...], Tuple[str, ...]]
+NO_FILTER: FacetFilter = ((), ())
+
+
+def normalize_query(keywords: Iterable[str], user_major: str = "") -> QueryKey:
+    """Order-insensitive, case-folded key for a keyword query"""
+    normalized = {' '.join(kw.split()).casefold() for kw in keywords if kw and kw.strip()}
+    return (' '.join((user_major or "").split()).casefold(), tuple(sorted(normalized)))
+
+
+def normalize_filter(universities: Optional[Iterable[str]] = None,
+                     majors: Optional[Iterable[str]] = None) -> FacetFilter:
+    """Order-insensitive key for university/major filters (values match the catalog exactly)"""
+    def clean(values):
+        return tuple(sorted({' '.join(v.split()) for v in values or () if v and v.strip()}))
+    return (clean(universities), clean(majors))
+
+
+def query_text(key: QueryKey) -> str:
+    """Text that is embedded for a normalized query"""
+    major, keywords = key
+    return f"{major} {' '.join(keywords)}".strip()
+
+
+class LRUCache:
+    """Thread-safe bounded LRU mapping with hit/miss counters"""
+
+    def __init__(self, maxsize: int, name: str = "cache"):
+        self.maxsize = maxsize
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
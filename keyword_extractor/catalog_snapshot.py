@@ -0,0 +1,244 @@
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 2
+SNAPSHOT_MANIFEST = "catalog.json"
+FIELDS = ("id", "name", "major", "university", "keywords", "introduction")
+# 긴 텍스트 필드는 연구실 단위로 zlib 압축해 저장하고, 읽을 때만 풀어서 사용
+COMPRESSED_FIELDS = frozenset({"introduction"})
+COMPRESSION_LEVEL = 6
+
+LABS_TS_PATTERN = re.compile(
+    r'export\s+const\s+labs\s*:\s*Lab\[\]\s*=\s*'
+    r'(\[\s*[\s\S]*?\])\s*;',
+    re.MULTILINE
+)
+
+
+def parse_labs_ts(ts_path) -> List[Dict[str, str]]:
+    """Parse the ``labs`` array out of labsData.ts"""
+    content = Path(ts_path).read_text(encoding='utf-8')
+    m = LABS_TS_PATTERN.search(content)
+    if not m:
+        raise ValueError("No lab data pattern found in file")
+
+    json_str = m.group(1)
+    try:
+        raw_data = json.loads(json_str)
+    except ValueError:
+        # 생성된 파일은 보통 순수 JSON이지만, 손으로 고친 경우(후행 쉼표 등)는 json5로 파싱
+        import json5
+        raw_data = json5.loads(json_str)
+    return [{field: item.get(field, "") or "" for field in FIELDS} for item in raw_data]
+
+
+def file_sha256(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CatalogSnapshot:
+    """Columnar, memory-mapped lab catalog compiled from labsData.ts.
+
+    Each field is a UTF-8 string table (``<field>-<version>.bin``) plus an
+    int64 offsets column; per-lab content hashes are stored alongside so
+    the embedding index can be validated without re-hashing any text.
+    Values of ``COMPRESSED_FIELDS`` are zlib-compressed one lab at a time,
+    so reading one introduction only inflates that lab's bytes.
+    """
+
+    def __init__(self, manifest: Dict[str, Any], blobs: Dict[str, Any], offsets: np.ndarray,
+                 hashes: np.ndarray):
+        self.manifest = manifest
+        self._blobs = blobs
+        self._offsets = offsets
+        self._hashes = hashes
+
+    def __len__(self) -> int:
+        return int(self.manifest["count"])
+
+    @property
+    def version(self) -> str:
+        return self.manifest["version"]
+
+    def get(self, field: str, row: int) -> str:
+        column = FIELDS.index(field)
+        start, end = self._offsets[column, row], self._offsets[column, row + 1]
+        value = self._blobs[field][start:end]
+        if field in COMPRESSED_FIELDS and value:
+            value = zlib.decompress(value)
+        return value.decode('utf-8')
+
+    def column(self, field: str) -> List[str]:
+        """Decode one field for every lab (e.g. ids) without touching the others"""
+        return [self.get(field, row) for row in range(len(self))]
+
+    def nbytes(self) -> int:
+        """Bytes of (compressed) string data held for this snapshot"""
+        return sum(len(blob) for blob in self._blobs.values())
+
+    @property
+    def mapped(self) -> bool:
+        """Whether the string tables are memory-mapped files rather than in-process bytes"""
+        return any(isinstance(blob, mmap.mmap) for blob in self._blobs.values())
+
+    def record(self, row: int) -> Dict[str, str]:
+        return {field: self.get(field, row) for field in FIELDS}
+
+    def records(self) -> List[Dict[str, str]]:
+        return [self.record(row) for row in range(len(self))]
+
+    def lab_hashes(self) -> List[str]:
+        return [h.decode('ascii') for h in self._hashes]
+
+    def is_fresh(self, source_path) -> bool:
+        """Whether the snapshot was compiled from the current source file"""
+        try:
+            st = os.stat(source_path)
+        except OSError:
+            return False
+        if st.st_size != self.manifest["source_size"]:
+            return False
+        if st.st_mtime_ns == self.manifest["source_mtime_ns"]:
+            return True
+        # mtime만 바뀐 경우(체크아웃 등)는 내용 해시로 확인
+        return file_sha256(source_path) == self.manifest["source_sha256"]
+
+    @classmethod
+    def load(cls, snapshot_dir) -> Optional["CatalogSnapshot"]:
+        snapshot_dir = Path(snapshot_dir)
+        manifest_path = snapshot_dir / SNAPSHOT_MANIFEST
+        if not manifest_path.exists():
+            return None
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+            if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+                return None
+            version = manifest["version"]
+            blobs = {}
+            for field in FIELDS:
+                path = snapshot_dir / f"{field}-{version}.bin"
+                if path.stat().st_size == 0:
+                    blobs[field] = b''
+                    continue
+                with open(path, 'rb') as f:
+                    blobs[field] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            offsets = np.load(snapshot_dir / f"offsets-{version}.npy", mmap_mode='r')
+            hashes = np.load(snapshot_dir / f"hashes-{version}.npy", mmap_mode='r')
+            return cls(manifest, blobs, offsets, hashes)
+        except Exception as e:
+            logger.warning(f"Could not load catalog snapshot from {snapshot_dir}: {str(e)}")
+            return None
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, str]], hashes: List[str]) -> "CatalogSnapshot":
+        """In-memory snapshot with the same columnar layout (used when the index dir is not writable)"""
+        blobs, offsets = _encode_columns(records)
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "version": hashlib.sha256(''.join(hashes).encode('ascii')).hexdigest()[:16],
+            "count": len(records),
+            "fields": list(FIELDS),
+            "compressed": sorted(COMPRESSED_FIELDS),
+        }
+        return cls(manifest, blobs, offsets, np.array(hashes, dtype='S64'))
+
+    @staticmethod
+    def write(snapshot_dir, source_path, records: List[Dict[str, str]], hashes: List[str]) -> None:
+        """Compile records into a snapshot, replacing any previous one atomically"""
+        snapshot_dir = Path(snapshot_dir)
+        snapshot_dir.mkdir(parents=True, exist_ok=True)
+        st = os.stat(source_path)
+        source_sha256 = file_sha256(source_path)
+        version = source_sha256[:16]
+
+        blobs, offsets = _encode_columns(records)
+        for field, blob in blobs.items():
+            _atomic_write(snapshot_dir / f"{field}-{version}.bin", blob)
+        _atomic_save_npy(snapshot_dir / f"offsets-{version}.npy", offsets)
+        _atomic_save_npy(snapshot_dir / f"hashes-{version}.npy", np.array(hashes, dtype='S64'))
+
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "version": version,
+            "count": len(records),
+            "fields": list(FIELDS),
+            "compressed": sorted(COMPRESSED_FIELDS),
+            "source_path": str(Path(source_path).resolve()),
+            "source_size": st.st_size,
+            "source_mtime_ns": st.st_mtime_ns,
+            "source_sha256": source_sha256,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        _atomic_write(snapshot_dir / SNAPSHOT_MANIFEST,
+                      json.dumps(manifest, ensure_ascii=False).encode('utf-8'))
+
+        for stale in snapshot_dir.iterdir():
+            if stale.is_file() and not stale.name.startswith('.') \
+                    and stale.name != SNAPSHOT_MANIFEST and version not in stale.name:
+                stale.unlink(missing_ok=True)
+        logger.info(f"Compiled catalog snapshot {version} ({len(records)} labs) to {snapshot_dir}")
+
+
+def _encode_columns(records: List[Dict[str, str]]):
+    """UTF-8 string table per field (compressed per lab where configured) plus offsets"""
+    blobs = {}
+    offsets = np.zeros((len(FIELDS), len(records) + 1), dtype=np.int64)
+    for column, field in enumerate(FIELDS):
+        encoded = [record[field].encode('utf-8') for record in records]
+        if field in COMPRESSED_FIELDS:
+            encoded = [zlib.compress(value, COMPRESSION_LEVEL) if value else b'' for value in encoded]
+        offsets[column, 1:] = np.cumsum([len(value) for value in encoded])
+        blobs[field] = b''.join(encoded)
+    return blobs, offsets
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def _atomic_save_npy(path: Path, array: np.ndarray) -> None:
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def main():
+    from lab_index import DEFAULT_INDEX_DIR, lab_content_hash
+    from types import SimpleNamespace
+
+    parser = argparse.ArgumentParser(description="Compile labsData.ts into a memory-mappable snapshot")
+    parser.add_argument("--data-path", default="../labfinder/src/app/database/labsData.ts")
+    parser.add_argument("--out", default=None, help="snapshot directory (default: <index dir>/catalog)")
+    args = parser.parse_args()
+
+    out = args.out or Path(os.getenv("LAB_INDEX_DIR", DEFAULT_INDEX_DIR)) / "catalog"
+    started = time.perf_counter()
+    records = parse_labs_ts(args.data_path)
+    hashes = [lab_content_hash(SimpleNamespace(**record)) for record in records]
+    CatalogSnapshot.write(out, args.data_path, records, hashes)
+    print(f"Compiled {len(records)} labs in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,236 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / "cv_cache"
+
+
+def _unlink_all(paths: List[Path]) -> None:
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+
+class _InFlight:
+    """Shared extraction task plus the number of requests awaiting it"""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class ExtractionCache:
+    """Content-addressed on-disk cache for CV keyword extraction results.
+
+    Entries are JSON files named by ``sha256(pdf bytes)`` plus the
+    extractor's prompt/model version. An in-memory index of entry sizes
+    and last-access times, built from one directory scan, drives LRU
+    eviction once the entry or byte budget is exceeded, so writes never
+    rescan the directory; entries older than the TTL are treated as
+    misses. All file I/O runs in a thread, off the event loop.
+    Concurrent requests for the same key share one in-flight extraction.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl_seconds: Optional[float] = None
+    ):
+        self.cache_dir = Path(cache_dir or os.getenv("CV_CACHE_DIR", DEFAULT_CACHE_DIR))
+        self.max_entries = max_entries or int(os.getenv("CV_CACHE_MAX_ENTRIES", "2000"))
+        self.max_bytes = max_bytes or int(os.getenv("CV_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+        self.ttl = ttl_seconds or float(os.getenv("CV_CACHE_TTL_S", str(7 * 24 * 3600)))
+        self._inflight: Dict[str, _InFlight] = {}
+        # key -> (마지막 접근 시각, 파일 크기), 오래전에 접근한 순서
+        self._index: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self._index_bytes = 0
+        self._index_loaded = False
+        self._index_lock: Optional[asyncio.Lock] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(content_sha256: str, version: str) -> str:
+        """Cache key from the upload's SHA-256 and the extractor version"""
+        return f"{content_sha256}-{version}"
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _scan(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path.stem))
+        entries.sort()
+        return entries
+
+    async def load_index(self) -> None:
+        """Build the in-memory index from one directory scan (once; also done lazily on first use)"""
+        if self._index_loaded:
+            return
+        if self._index_lock is None:
+            self._index_lock = asyncio.Lock()
+        async with self._index_lock:
+            if self._index_loaded:
+                return
+            for mtime, size, key in await asyncio.to_thread(self._scan):
+                self._track(key, mtime, size)
+            self._index_loaded = True
+            logger.info(f"CV cache index: {len(self._index)} entries, {self._index_bytes} bytes")
+        await self._evict()
+
+    def _track(self, key: str, accessed: float, size: int) -> None:
+        previous = self._index.pop(key, None)
+        if previous is not None:
+            self._index_bytes -= previous[1]
+        self._index[key] = (accessed, size)
+        self._index_bytes += size
+
+    def _untrack(self, key: str) -> None:
+        previous = self._index.pop(key, None)
+        if previous is not None:
+            self._index_bytes -= previous[1]
+
+    def _read(self, key: str) -> Optional[Tuple[Dict[str, Any], int]]:
+        path = self._path(key)
+        try:
+            raw = path.read_bytes()
+            entry = json.loads(raw)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("created_at", 0) > self.ttl:
+            path.unlink(missing_ok=True)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry, len(raw)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        await self.load_index()
+        # 다른 워커 프로세스가 쓴 항목은 인덱스에 없을 수 있으므로 디스크도 확인
+        found = await asyncio.to_thread(self._read, key)
+        if found is None:
+            self._untrack(key)
+            self.misses += 1
+            return None
+
+        entry, size = found
+        self._track(key, time.time(), size)
+        self.hits += 1
+        return entry["result"]
+
+    def _write(self, key: str, payload: bytes) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 여러 워커 프로세스가 같은 키를 동시에 써도 겹치지 않도록 쓰기마다 고유한 임시 파일 사용
+        with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f"{key}.", suffix=".tmp", delete=False) as tmp:
+            tmp_path = tmp.name
+            try:
+                tmp.write(payload)
+            except BaseException:
+                tmp.close()
+                os.unlink(tmp_path)
+                raise
+        try:
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    async def put(self, key: str, result: Dict[str, Any]) -> None:
+        await self.load_index()
+        payload = json.dumps(
+            {"created_at": time.time(), "result": result}, ensure_ascii=False
+        ).encode('utf-8')
+        try:
+            await asyncio.to_thread(self._write, key, payload)
+        except OSError as e:
+            logger.warning(f"Could not write CV cache entry: {str(e)}")
+            return
+        self._track(key, time.time(), len(payload))
+        await self._evict()
+
+    async def _evict(self) -> None:
+        """Drop expired entries, then least recently used ones over budget (from the index, no rescan)"""
+        expired_before = time.time() - self.ttl
+        victims = []
+        while self._index:
+            key, (accessed, _) = next(iter(self._index.items()))
+            if accessed >= expired_before \
+                    and len(self._index) <= self.max_entries and self._index_bytes <= self.max_bytes:
+                break
+            self._untrack(key)
+            victims.append(self._path(key))
+        if victims:
+            self.evictions += len(victims)
+            await asyncio.to_thread(_unlink_all, victims)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """Return the cached result or run ``compute`` once per key.
+
+        A waiter that is cancelled (e.g. its client disconnected) does not
+        cancel the shared extraction unless it was the last one waiting.
+        """
+        cached = await self.get(key)
+        if cached is not None:
+            return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            inflight = _InFlight(asyncio.ensure_future(self._compute_and_store(key, compute)))
+            self._inflight[key] = inflight
+            inflight.task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+
+        inflight.waiters += 1
+        try:
+            return await asyncio.shield(inflight.task)
+        finally:
+            inflight.waiters -= 1
+            if inflight.waiters == 0 and not inflight.task.done():
+                inflight.task.cancel()
+
+    async def _compute_and_store(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        result = await compute()
+        await self.put(key, result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "entries": len(self._index),
+            "bytes": self._index_bytes,
+            "in_flight": len(self._inflight)
+        }
@@ -0,0 +1,105 @@
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+# 다양성 재정렬 설정: (대학별 최대 개수, 학과별 최대 개수, MMR 람다); 0 / 1.0이면 해당 기능 끔
+DiversityPolicy = Tuple[int, int, float]
+NO_DIVERSITY: DiversityPolicy = (0, 0, 1.0)
+
+# 기본값은 모두 꺼짐: 요청(max_per_university 등)이나 환경 변수로 켤 때만 재정렬하고 후보를 넓게 가져옴
+MAX_PER_UNIVERSITY = int(os.getenv("LAB_MAX_PER_UNIVERSITY", "0"))
+MAX_PER_MAJOR = int(os.getenv("LAB_MAX_PER_MAJOR", "0"))
+MMR_LAMBDA = float(os.getenv("LAB_MMR_LAMBDA", "1.0"))
+# 재정렬 대상 후보 수 (top_n보다 작으면 top_n만큼)
+DIVERSITY_CANDIDATES = int(os.getenv("LAB_DIVERSITY_CANDIDATES", "300"))
+
+
+def diversity_policy(
+    max_per_university: Optional[int] = None,
+    max_per_major: Optional[int] = None,
+    mmr_lambda: Optional[float] = None
+) -> DiversityPolicy:
+    """Hashable policy with server defaults filled in (used as part of the response cache key)"""
+    return (
+        max(0, MAX_PER_UNIVERSITY if max_per_university is None else int(max_per_university)),
+        max(0, MAX_PER_MAJOR if max_per_major is None else int(max_per_major)),
+        min(1.0, max(0.0, MMR_LAMBDA if mmr_lambda is None else float(mmr_lambda))),
+    )
+
+
+def is_active(policy: DiversityPolicy) -> bool:
+    return policy[0] > 0 or policy[1] > 0 or policy[2] < 1.0
+
+
+def diversify(
+    scores: np.ndarray,
+    k: int,
+    policy: DiversityPolicy,
+    university_codes: Optional[np.ndarray] = None,
+    major_codes: Optional[np.ndarray] = None,
+    vectors: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Greedy re-ranking of candidates given in ranked order; returns candidate positions in new order
+
+    Each step picks the next candidate whose university and major are
+    still under their caps: without MMR the first one in input order,
+    with it the one maximizing
+    ``lambda * relevance - (1 - lambda) * max similarity to the picks so far``.
+    Picking updates the per-candidate max similarity with one matrix-vector
+    product (or one row of the candidate Gram matrix when many picks are
+    needed) and blocks a capped facet with one vectorized comparison, so
+    there is no Python loop over candidates or previous picks. When the
+    caps leave fewer than ``k`` candidates, the rest is filled ignoring
+    them (the "max N per school, then fill" rule).
+    """
+    max_per_university, max_per_major, mmr_lambda = policy
+    n = len(scores)
+    k = min(k, n)
+    use_mmr = mmr_lambda < 1.0 and vectors is not None
+    if use_mmr:
+        relevance = np.asarray(scores, dtype=np.float32)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        max_sim = np.full(n, -np.inf, dtype=np.float32)
+        # 고를 개수가 많으면 후보 간 유사도 행렬을 한 번에 계산하는 편이 (GEMM 한 번) 더 빠름
+        gram = vectors @ vectors.T if k > n // 8 else None
+    else:
+        # 점수가 아니라 입력 순위를 유지 (하이브리드 RRF는 표시 점수와 순위가 다름)
+        relevance = -np.arange(n, dtype=np.float32)
+
+    caps = []
+    for codes, cap in ((university_codes, max_per_university), (major_codes, max_per_major)):
+        if codes is not None and cap > 0:
+            caps.append((codes, cap, np.zeros(int(codes.max()) + 1 if n else 0, dtype=np.int32)))
+
+    # 0 또는 -inf: 이미 고른 후보와 상한에 걸린 후보를 목적 함수에서 제외
+    excluded = np.zeros(n, dtype=np.float32)
+    taken = np.zeros(n, dtype=bool)
+
+    def objective(step: int) -> np.ndarray:
+        if use_mmr and step:
+            return mmr_lambda * relevance - (1.0 - mmr_lambda) * max_sim + excluded
+        return relevance + excluded
+
+    filling = False
+    order = np.empty(k, dtype=np.int64)
+    for step in range(k):
+        values = objective(step)
+        pick = int(np.argmax(values))
+        if values[pick] == -np.inf:
+            # 상한 안에 남은 후보가 없으면 상한 없이 나머지 자리를 채움
+            filling = True
+            excluded = np.where(taken, -np.inf, 0.0).astype(np.float32)
+            pick = int(np.argmax(objective(step)))
+        order[step] = pick
+        taken[pick] = True
+        excluded[pick] = -np.inf
+        if not filling:
+            for codes, cap, counts in caps:
+                code = codes[pick]
+                counts[code] += 1
+                if counts[code] == cap:
+                    excluded[codes == code] = -np.inf
+        if use_mmr:
+            np.maximum(max_sim, gram[pick] if gram is not None else vectors @ vectors[pick], out=max_sim)
+    return order
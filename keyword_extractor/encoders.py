@@ -0,0 +1,343 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+logger = logging.getLogger(__name__)
+
+try:
+    import onnxruntime
+except ImportError:  # onnx 백엔드는 선택 사항
+    onnxruntime = None
+
+ENCODER_BACKENDS = ("torch", "quantized", "onnx", "distilled")
+DEFAULT_ONNX_DIR = Path(__file__).resolve().parent / "lab_index" / "onnx"
+
+
+class QueryEncoder:
+    """Turns query texts into L2-normalized float32 embeddings"""
+
+    name = "base"
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        raise NotImplementedError
+
+    def dimension(self) -> int:
+        """Output embedding dimension (probed with one encode unless the backend knows it)"""
+        return int(self.encode(["dimension probe"]).shape[1])
+
+    def describe(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class SentenceTransformerEncoder(QueryEncoder):
+    """Reference PyTorch SentenceTransformer forward pass"""
+
+    name = "torch"
+
+    def __init__(self, model_name: str, model: Optional[SentenceTransformer] = None):
+        self.model_name = model_name
+        self.model = model or SentenceTransformer(model_name, device="cpu")
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        embeddings = self.model.encode(
+            texts,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            batch_size=batch_size
+        )
+        return np.asarray(embeddings, dtype=np.float32)
+
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension() or super().dimension()
+
+    def describe(self) -> Dict[str, Any]:
+        return {"backend": self.name, "model": self.model_name}
+
+
+class QuantizedEncoder(SentenceTransformerEncoder):
+    """Same model with its Linear layers dynamically quantized to int8"""
+
+    name = "quantized"
+
+    def __init__(self, model_name: str):
+        import torch
+
+        model = SentenceTransformer(model_name, device="cpu")
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        super().__init__(model_name, model)
+
+
+class DistilledEncoder(SentenceTransformerEncoder):
+    """Smaller student model trained to reproduce the reference embedding space.
+
+    Lab embeddings are still produced by the reference model, so the
+    student must output vectors in the same space (same dimension,
+    checked against the lab index at startup); run the parity check
+    before enabling it.
+    """
+
+    name = "distilled"
+
+
+class ONNXEncoder(QueryEncoder):
+    """Exported transformer graph run with ONNX Runtime, mean pooling in NumPy"""
+
+    name = "onnx"
+
+    def __init__(self, model_dir, quantized: bool = False, threads: Optional[int] = None):
+        if onnxruntime is None:
+            raise RuntimeError("onnxruntime is not installed")
+        from transformers import AutoTokenizer
+
+        self.model_dir = Path(model_dir)
+        self.meta = json.loads((self.model_dir / "encoder.json").read_text(encoding='utf-8'))
+        self.model_name = self.meta["model_name"]
+        self.max_length = self.meta["max_seq_length"]
+        self.tokenizer = AutoTokenizer.from_pretrained(str(self.model_dir))
+
+        model_file = "model.int8.onnx" if quantized else "model.onnx"
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            str(self.model_dir / model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.model_file = model_file
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            batch = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np"
+            )
+            feeds = {name: batch[name].astype(np.int64) for name in self.input_names}
+            hidden = self.session.run(None, feeds)[0]
+            # SentenceTransformer와 동일한 mean pooling + 정규화
+            mask = batch["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            outputs.append(pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None))
+        if not outputs:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.concatenate(outputs).astype(np.float32, copy=False)
+
+    def dimension(self) -> int:
+        return int(self.meta.get("dim") or super().dimension())
+
+    def describe(self) -> Dict[str, Any]:
+        return {"backend": self.name, "model": self.model_name, "file": self.model_file}
+
+
+def export_onnx(model_name: str, out_dir, quantize: bool = True, opset: int = 14) -> Path:
+    """Export the transformer of ``model_name`` to ONNX (plus an int8 copy) with its tokenizer"""
+    import torch
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0]
+
+    class HiddenStates(torch.nn.Module):
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, input_ids, attention_mask):
+            return self.auto_model(input_ids=input_ids, attention_mask=attention_mask)[0]
+
+    dummy = transformer.tokenizer(["export sample"], return_tensors="pt")
+    torch.onnx.export(
+        HiddenStates(transformer.auto_model).eval(),
+        (dummy["input_ids"], dummy["attention_mask"]),
+        str(out_dir / "model.onnx"),
+        input_names=["input_ids", "attention_mask"],
+        output_names=["last_hidden_state"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "last_hidden_state": {0: "batch", 1: "sequence"},
+        },
+        opset_version=opset
+    )
+    transformer.tokenizer.save_pretrained(str(out_dir))
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(str(out_dir / "model.onnx"), str(out_dir / "model.int8.onnx"), weight_type=QuantType.QInt8)
+
+    meta = {
+        "model_name": model_name,
+        "max_seq_length": int(model.max_seq_length),
+        "dim": int(model.get_sentence_embedding_dimension()),
+        "exported_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    (out_dir / "encoder.json").write_text(json.dumps(meta, indent=2), encoding='utf-8')
+    logger.info(f"Exported {model_name} to {out_dir}")
+    return out_dir
+
+
+def check_dimension(encoder: QueryEncoder, dim: int) -> None:
+    """Raise ``ValueError`` unless ``encoder`` outputs ``dim``-dimensional embeddings (the lab index's)"""
+    actual = encoder.dimension()
+    if actual != dim:
+        raise ValueError(
+            f"{encoder.name} encoder {encoder.describe().get('model', '')} outputs {actual}-dim embeddings, "
+            f"but lab embeddings from the reference model are {dim}-dim"
+        )
+
+
+def build_query_encoder(model_name: str, backend: str, dim: Optional[int] = None) -> QueryEncoder:
+    """Build exactly the ``backend`` encoder; raises if it cannot be loaded or does not match ``dim``"""
+    if backend == "torch":
+        return SentenceTransformerEncoder(model_name)
+    if backend == "quantized":
+        encoder = QuantizedEncoder(model_name)
+    elif backend == "onnx":
+        encoder = ONNXEncoder(
+            os.getenv("LAB_ENCODER_ONNX_DIR", DEFAULT_ONNX_DIR),
+            quantized=os.getenv("LAB_ENCODER_ONNX_INT8", "0") == "1",
+            threads=int(os.getenv("LAB_ENCODER_THREADS", "0")) or None
+        )
+        if encoder.model_name != model_name:
+            raise ValueError(f"ONNX export is for '{encoder.model_name}', not '{model_name}'")
+    elif backend == "distilled":
+        student = os.getenv("LAB_DISTILLED_MODEL")
+        if not student:
+            raise ValueError("LAB_DISTILLED_MODEL is not set")
+        encoder = DistilledEncoder(student)
+    else:
+        raise ValueError(f"Unknown encoder backend '{backend}' (expected one of: {', '.join(ENCODER_BACKENDS)})")
+    if dim:
+        check_dimension(encoder, dim)
+    return encoder
+
+
+def create_query_encoder(model_name: str, backend: Optional[str] = None, dim: Optional[int] = None) -> QueryEncoder:
+    """Create the configured query encoder, falling back to the reference model.
+
+    With ``dim`` (the lab index's embedding dimension), a backend whose
+    output dimension differs is rejected the same way as one that fails
+    to load.
+
+    Environment:
+        LAB_ENCODER_BACKEND   torch | quantized | onnx | distilled (default: torch)
+        LAB_ENCODER_ONNX_DIR  directory written by ``python encoders.py export``
+        LAB_ENCODER_ONNX_INT8 1 to run the int8-quantized ONNX graph
+        LAB_ENCODER_THREADS   ONNX Runtime intra-op threads
+        LAB_DISTILLED_MODEL   name or path of the student model
+    """
+    backend = (backend or os.getenv("LAB_ENCODER_BACKEND", "torch")).lower()
+    try:
+        return build_query_encoder(model_name, backend, dim)
+    except Exception as e:
+        logger.error(f"Error loading {backend} encoder, using torch: {str(e)}")
+    return SentenceTransformerEncoder(model_name)
+
+
+def check_parity(
+    reference: QueryEncoder,
+    candidate: QueryEncoder,
+    texts: List[str],
+    lab_embeddings: Optional[np.ndarray] = None,
+    k: int = 10
+) -> Dict[str, Any]:
+    """Cosine agreement (and top-k overlap against the labs) between two encoders
+
+    Raises ``ValueError`` when the candidate's embeddings do not have the
+    reference (or lab index) dimension, since they cannot be compared.
+    """
+    started = time.perf_counter()
+    expected = reference.encode(texts)
+    reference_s = time.perf_counter() - started
+    started = time.perf_counter()
+    actual = candidate.encode(texts)
+    candidate_s = time.perf_counter() - started
+
+    dim = lab_embeddings.shape[1] if lab_embeddings is not None else expected.shape[1]
+    for name, embeddings in (("reference", expected), ("candidate", actual)):
+        if embeddings.shape[1] != dim:
+            raise ValueError(
+                f"{name} encoder outputs {embeddings.shape[1]}-dim embeddings, "
+                f"expected {dim} (reference model / lab index)"
+            )
+
+    cosines = np.sum(expected * actual, axis=1)
+    report = {
+        "texts": len(texts),
+        "cosine_mean": float(cosines.mean()),
+        "cosine_p5": float(np.percentile(cosines, 5)),
+        "cosine_min": float(cosines.min()),
+        "reference_ms_per_text": reference_s * 1000 / max(1, len(texts)),
+        "candidate_ms_per_text": candidate_s * 1000 / max(1, len(texts)),
+    }
+    if lab_embeddings is not None:
+        from ann_index import select_top_k
+
+        overlap = 0
+        for q_ref, q_new in zip(expected, actual):
+            top_ref = select_top_k(lab_embeddings @ q_ref, k)
+            top_new = select_top_k(lab_embeddings @ q_new, k)
+            overlap += len(set(top_ref.tolist()) & set(top_new.tolist()))
+        report[f"top{k}_overlap"] = overlap / max(1, k * len(texts))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and validate query encoder backends")
+    parser.add_argument("command", choices=["export", "parity"])
+    parser.add_argument("--model", default="all-mpnet-base-v2")
+    parser.add_argument("--out", default=None, help="export: output directory")
+    parser.add_argument("--backend", default=None, help="parity: backend to compare with torch")
+    parser.add_argument("--index-dir", default=None)
+    parser.add_argument("--samples", type=int, default=500)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_onnx(args.model, args.out or os.getenv("LAB_ENCODER_ONNX_DIR", DEFAULT_ONNX_DIR))
+        return
+
+    from catalog_snapshot import CatalogSnapshot
+    from lab_index import DEFAULT_INDEX_DIR, LabIndexBundle
+
+    index_dir = Path(args.index_dir or os.getenv("LAB_INDEX_DIR", DEFAULT_INDEX_DIR))
+    snapshot = CatalogSnapshot.load(index_dir / "catalog")
+    if snapshot is None:
+        print(f"No catalog snapshot at {index_dir / 'catalog'}; run lab_index.py build first")
+        return
+    bundle = LabIndexBundle.load(index_dir)
+
+    # 실제 카탈로그의 키워드 문자열을 질의 표본으로 사용
+    rng = np.random.default_rng(0)
+    rows = rng.choice(len(snapshot), min(args.samples, len(snapshot)), replace=False)
+    texts = [snapshot.get("keywords", int(row)) for row in rows]
+
+    # 요청한 백엔드를 그대로 비교 (실패 시 torch로 대체하면 torch끼리 비교하게 되므로 종료 코드 1로 실패)
+    backend = (args.backend or os.getenv("LAB_ENCODER_BACKEND", "torch")).lower()
+    lab_embeddings = bundle.embeddings if bundle is not None else None
+    reference = SentenceTransformerEncoder(args.model)
+    try:
+        candidate = build_query_encoder(
+            args.model, backend, lab_embeddings.shape[1] if lab_embeddings is not None else None
+        )
+        report = check_parity(reference, candidate, texts, lab_embeddings)
+    except Exception as e:
+        print(f"Parity check failed for the {backend} encoder: {str(e)}")
+        sys.exit(1)
+    print(json.dumps({"candidate": candidate.describe(), **report}, indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,110 @@
+import asyncio
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturatedError(Exception):
+    """Raised when a work pool's queue is full"""
+
+
+class BoundedThreadPool(ThreadPoolExecutor):
+    """ThreadPoolExecutor with a bounded backlog and queue-depth counters"""
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        super().__init__(max_workers=max_workers, thread_name_prefix=f"{name}-pool")
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._stats_lock = threading.Lock()
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        with self._stats_lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise PoolSaturatedError(f"{self.name} pool is saturated ({self.queued} jobs queued)")
+            self.queued += 1
+        try:
+            return super().submit(self._track, fn, args, kwargs)
+        except BaseException:
+            with self._stats_lock:
+                self.queued -= 1
+            raise
+
+    def _track(self, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        with self._stats_lock:
+            self.queued -= 1
+            self.active += 1
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            with self._stats_lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._stats_lock:
+                self.active -= 1
+                self.completed += 1
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self.active,
+                "queued": self.queued,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected
+            }
+
+
+class WorkPools:
+    """Dedicated bounded pools per kind of blocking work.
+
+    The event loop only awaits these pools, so a slow job of one kind
+    (e.g. a large PDF) cannot stall requests that need another kind or
+    none at all.
+    """
+
+    # 작업 종류별 기본값: (워커 수, 대기열 한도)
+    DEFAULTS = {
+        "pdf": (2, 32),
+        "embedding": (1, 16),
+    }
+
+    def __init__(self):
+        self.pools: Dict[str, BoundedThreadPool] = {}
+        for kind, (workers, queue) in self.DEFAULTS.items():
+            prefix = f"LAB_POOL_{kind.upper()}"
+            self.pools[kind] = BoundedThreadPool(
+                kind,
+                max_workers=int(os.getenv(f"{prefix}_WORKERS", workers)),
+                max_queue=int(os.getenv(f"{prefix}_QUEUE", queue))
+            )
+
+    def __getitem__(self, kind: str) -> BoundedThreadPool:
+        return self.pools[kind]
+
+    async def run(self, kind: str, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking callable in the pool for ``kind`` and await its result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pools[kind], functools.partial(fn, *args, **kwargs))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {kind: pool.stats() for kind, pool in self.pools.items()}
+
+    def shutdown(self) -> None:
+        for pool in self.pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -1,63 +1,26 @@
-import PyPDF2
 import google.generativeai as genai
 import os
 import json
-import re
-from typing import Dict, List
+import hashlib
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
+from executors import WorkPools
+from gemini_client import AsyncGeminiClient, GeminiTimeoutError
+from pdf_text import PdfSource, PROMPT_CHAR_BUDGET, clean_text, extract_cv_text
+from pdf_workers import PdfWorkerPool, PdfParseError
 
 # 환경변수 로드
 load_dotenv()
 
-class KeywordExtractor:
-    def __init__(self):
-        # Gemini API 키 설정
-        self.gemini_api_key = os.getenv("GEMINI_API_KEY")
-        if not self.gemini_api_key:
-            raise Exception("GEMINI_API_KEY가 설정되지 않았습니다.")
-        
-        genai.configure(api_key=self.gemini_api_key)
-        self.gemini_model = genai.GenerativeModel('gemini-2.0-flash')
-    
-    def is_configured(self) -> bool:
-        """Gemini API 키가 설정되어 있는지 확인"""
-        return bool(self.gemini_api_key)
-    
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
-        """PDF에서 텍스트 추출"""
-        try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    text += page.extract_text() + "\n"
-                
-                return text.strip()
-        
-        except Exception as e:
-            raise Exception(f"PDF 텍스트 추출 실패: {str(e)}")
-    
-    def clean_text(self, text: str) -> str:
-        """텍스트 전처리"""
-        # 불필요한 문자 제거
-        text = re.sub(r'[^\w\s\.\-\+\#]', ' ', text)
-        # 연속된 공백 제거
-        text = re.sub(r'\s+', ' ', text)
-        # 앞뒤 공백 제거
-        text = text.strip()
-        return text
-    
-    async def extract_with_gemini(self, text: str) -> Dict:
-        """Gemini API를 사용한 키워드 추출"""
-        try:
-            prompt = f"""
+GEMINI_MODEL_NAME = 'gemini-2.0-flash'
+
+# 키워드 추출 프롬프트 (변경 시 CV 추출 캐시가 자동으로 무효화됨)
+PROMPT_TEMPLATE = """
 다음은 연구자의 CV 텍스트입니다. 이 CV에서 연구 관련 키워드를 추출해서 분류해주세요.
 한국어와 영어가 혼용되어 있을 수 있습니다.
 
 CV 텍스트:
-{text[:6000]}  # Gemini는 더 많은 토큰 처리 가능
+{text}
 
 다음 JSON 형태로 정확히 응답해주세요:
 {{
@@ -78,9 +41,66 @@ CV 텍스트:
 -각 키워드는 중복 없이 한 번만 포함
 """
 
+class KeywordExtractor:
+    def __init__(self, pools: Optional[WorkPools] = None, pdf_workers: Optional[PdfWorkerPool] = None):
+        # 블로킹 작업(PDF 파싱)을 실행할 작업 풀
+        self.pools = pools
+        # PDF 파싱을 격리된 프로세스에서 실행 (없으면 현재 프로세스에서 파싱)
+        self.pdf_workers = pdf_workers
+
+        # Gemini API 키 설정
+        self.gemini_api_key = os.getenv("GEMINI_API_KEY")
+        if not self.gemini_api_key:
+            raise Exception("GEMINI_API_KEY가 설정되지 않았습니다.")
+        
+        genai.configure(api_key=self.gemini_api_key)
+        self.gemini_model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+        # 동시성 제한, 타임아웃, 재시도가 적용된 비동기 클라이언트
+        self.gemini = AsyncGeminiClient(self.gemini_model)
+    
+    async def _run_blocking(self, kind: str, fn, *args):
+        """블로킹 함수를 작업 풀에서 실행 (풀이 없으면 직접 실행)"""
+        if self.pools is None:
+            return fn(*args)
+        return await self.pools.run(kind, fn, *args)
+
+    @property
+    def cache_version(self) -> str:
+        """프롬프트/모델/텍스트 예산 버전 (추출 결과 캐시 키에 사용)"""
+        digest = hashlib.sha256(
+            f"{GEMINI_MODEL_NAME}\n{PROMPT_CHAR_BUDGET}\n{PROMPT_TEMPLATE}".encode('utf-8')
+        )
+        return digest.hexdigest()[:12]
+
+    def is_configured(self) -> bool:
+        """Gemini API 키가 설정되어 있는지 확인"""
+        return bool(self.gemini_api_key)
+    
+    def extract_text_from_pdf(self, source: PdfSource, char_budget: int = PROMPT_CHAR_BUDGET) -> str:
+        """PDF에서 프롬프트 예산만큼의 정제된 텍스트 추출 (파일 경로, 바이트, 파일 객체 모두 지원)"""
+        try:
+            if self.pdf_workers is None:
+                return extract_cv_text(source, char_budget)
+            if isinstance(source, str):
+                with open(source, 'rb') as f:
+                    source = f.read()
+            elif hasattr(source, 'read'):
+                source = source.read()
+            return self.pdf_workers.parse(source, char_budget)
+        except Exception as e:
+            raise PdfParseError(f"PDF 텍스트 추출 실패: {str(e)}")
+    
+    def clean_text(self, text: str) -> str:
+        """텍스트 전처리"""
+        return clean_text(text)
+    
+    async def extract_with_gemini(self, text: str) -> Dict:
+        """Gemini API를 사용한 키워드 추출"""
+        try:
+            prompt = PROMPT_TEMPLATE.format(text=text[:PROMPT_CHAR_BUDGET])
+
             # Gemini API 호출
-            response = self.gemini_model.generate_content(prompt)
-            content = response.text.strip()
+            content = (await self.gemini.generate(prompt)).strip()
             
             # JSON 파싱 시도
             try:
@@ -101,6 +121,8 @@ CV 텍스트:
                 print(f"JSON 파싱 오류: {str(e)}")
                 raise Exception("Gemini API 응답을 JSON으로 파싱할 수 없습니다.")
         
+        except GeminiTimeoutError:
+            raise
         except Exception as e:
             print(f"Gemini 키워드 추출 중 오류 발생: {str(e)}")
             raise Exception(f"Gemini 키워드 추출 실패: {str(e)}")
@@ -115,13 +137,15 @@ CV 텍스트:
         # 중복 제거 및 정렬
         return list(set(all_keywords))[:20]  # 최대 20개
     
-    async def extract_keywords(self, pdf_path: str) -> Dict:
+    async def extract_keywords(self, source: PdfSource) -> Dict:
         """메인 키워드 추출 함수"""
-        print(f"📄 PDF 파일 처리 시작: {pdf_path}")
+        if isinstance(source, str):
+            print(f"📄 PDF 파일 처리 시작: {source}")
+        else:
+            print("📄 PDF 처리 시작 (메모리 버퍼)")
         
         # 1. PDF에서 텍스트 추출
-        text = self.extract_text_from_pdf(pdf_path)
-        cleaned_text = self.clean_text(text)
+        cleaned_text = await self._run_blocking("pdf", self.extract_text_from_pdf, source)
         
         if len(cleaned_text) < 100:
             raise Exception("추출된 텍스트가 너무 짧습니다. PDF 파일을 확인해주세요.")
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import os
+import random
+from typing import Any, Dict
+
+from google.api_core import exceptions as google_exceptions
+
+logger = logging.getLogger(__name__)
+
+# 재시도 대상 HTTP 상태 코드 (rate limit, 서버 오류)
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class GeminiTimeoutError(Exception):
+    """Raised when a Gemini call does not finish before its deadline"""
+
+
+class AsyncGeminiClient:
+    """Native-async wrapper around a GenerativeModel.
+
+    Every call is bounded by a process-wide concurrency semaphore and an
+    overall deadline (queueing and retries included). 429/5xx responses are
+    retried with full-jitter exponential backoff. Cancelling the awaiting
+    task cancels the in-flight request.
+    """
+
+    def __init__(
+        self,
+        model,
+        max_concurrency: int = None,
+        timeout: float = None,
+        max_retries: int = None,
+        base_backoff: float = 0.5,
+        max_backoff: float = 8.0
+    ):
+        self.model = model
+        self.max_concurrency = max_concurrency or int(os.getenv("GEMINI_MAX_CONCURRENCY", "16"))
+        self.timeout = timeout or float(os.getenv("GEMINI_TIMEOUT_S", "30"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        self.in_flight = 0
+        self.calls = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.failures = 0
+
+    async def generate(self, prompt: str) -> str:
+        """Generate content for ``prompt`` and return the response text"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        self.calls += 1
+        attempt = 0
+
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                self.timeouts += 1
+                raise GeminiTimeoutError(f"Gemini 응답 시간 초과 ({self.timeout:.0f}초)")
+            try:
+                return await asyncio.wait_for(self._attempt(prompt, remaining), remaining)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise GeminiTimeoutError(f"Gemini 응답 시간 초과 ({self.timeout:.0f}초)")
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+            except google_exceptions.GoogleAPICallError as e:
+                if e.code not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    self.failures += 1
+                    raise
+                delay = random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempt))
+                if loop.time() + delay >= deadline:
+                    self.failures += 1
+                    raise
+                attempt += 1
+                self.retries += 1
+                logger.warning(f"Gemini call failed with {e.code}, retry {attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def _attempt(self, prompt: str, remaining: float) -> str:
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                response = await self.model.generate_content_async(
+                    prompt,
+                    request_options={"timeout": remaining}
+                )
+                return response.text
+            finally:
+                self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "timeout_s": self.timeout,
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "cancelled": self.cancelled,
+            "failures": self.failures
+        }
@@ -0,0 +1,199 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 인덱스 번들 포맷 정의
+BUNDLE_FORMAT_VERSION = 1
+TEXT_RECIPE = "major+keywords+introduction/space-join/v1"
+MANIFEST_FILE = "manifest.json"
+DEFAULT_INDEX_DIR = Path(__file__).resolve().parent / "lab_index"
+
+
+def build_lab_text(lab) -> str:
+    """Build the text that is embedded for a lab (see TEXT_RECIPE)"""
+    return ' '.join(filter(None, [lab.major, lab.keywords, lab.introduction]))
+
+
+def lab_content_hash(lab) -> str:
+    """SHA-256 over every field of a lab"""
+    digest = hashlib.sha256()
+    for value in (lab.id, lab.name, lab.major, lab.university, lab.keywords, lab.introduction):
+        digest.update((value or "").encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+def compute_catalog_version(model_name: str, ids: List[str], hashes: List[str]) -> str:
+    """Short version string identifying a (model, recipe, catalog) combination"""
+    digest = hashlib.sha256()
+    digest.update(f"{BUNDLE_FORMAT_VERSION}|{model_name}|{TEXT_RECIPE}".encode('utf-8'))
+    for lab_id, content_hash in zip(ids, hashes):
+        digest.update(f"|{lab_id}:{content_hash}".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+class LabIndexBundle:
+    """Embedding matrix plus the manifest describing how it was built.
+
+    On disk the bundle is a directory holding ``manifest.json`` and an
+    ``embeddings-<version>.npy`` file that is memory-mapped on load. The
+    manifest is replaced last, so readers never see a half-written bundle.
+    """
+
+    def __init__(self, manifest: Dict[str, Any], embeddings: np.ndarray):
+        self.manifest = manifest
+        self.embeddings = embeddings
+
+    @property
+    def catalog_version(self) -> str:
+        return self.manifest["catalog_version"]
+
+    @property
+    def model_name(self) -> str:
+        return self.manifest["model_name"]
+
+    @property
+    def lab_ids(self) -> List[str]:
+        return self.manifest["lab_ids"]
+
+    @classmethod
+    def create(cls, model_name: str, labs: List[Any], embeddings: np.ndarray,
+               hashes: Optional[List[str]] = None) -> "LabIndexBundle":
+        ids = [lab.id for lab in labs]
+        if hashes is None:
+            hashes = [lab_content_hash(lab) for lab in labs]
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        manifest = {
+            "format_version": BUNDLE_FORMAT_VERSION,
+            "model_name": model_name,
+            "text_recipe": TEXT_RECIPE,
+            "catalog_version": compute_catalog_version(model_name, ids, hashes),
+            "count": len(labs),
+            "dim": int(embeddings.shape[1]) if embeddings.ndim == 2 else 0,
+            "dtype": "float32",
+            "normalized": True,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "lab_ids": ids,
+            "lab_hashes": hashes,
+        }
+        return cls(manifest, embeddings)
+
+    @classmethod
+    def load(cls, index_dir) -> Optional["LabIndexBundle"]:
+        """Load a bundle from disk, returning None if it is missing or unreadable"""
+        index_dir = Path(index_dir)
+        manifest_path = index_dir / MANIFEST_FILE
+        if not manifest_path.exists():
+            return None
+
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+            if manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+                logger.info("Lab index format changed, ignoring existing bundle")
+                return None
+            embeddings = np.load(index_dir / manifest["embeddings_file"], mmap_mode='r')
+            if embeddings.shape[0] != manifest["count"]:
+                logger.warning("Lab index embeddings do not match manifest count")
+                return None
+            return cls(manifest, embeddings)
+        except Exception as e:
+            logger.warning(f"Could not load lab index from {index_dir}: {str(e)}")
+            return None
+
+    def matches(self, model_name: str, labs: List[Any], hashes: Optional[List[str]] = None) -> bool:
+        """Check whether this bundle was built from the given model and labs"""
+        if self.manifest.get("model_name") != model_name:
+            return False
+        if self.manifest.get("text_recipe") != TEXT_RECIPE:
+            return False
+        if len(labs) != self.manifest.get("count"):
+            return False
+        if [lab.id for lab in labs] != self.lab_ids:
+            return False
+        if hashes is None:
+            hashes = [lab_content_hash(lab) for lab in labs]
+        return hashes == self.manifest.get("lab_hashes")
+
+    def save(self, index_dir) -> None:
+        """Write the bundle to disk, replacing any previous bundle atomically"""
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+
+        embeddings_file = f"embeddings-{self.catalog_version}.npy"
+        tmp_path = index_dir / f".{embeddings_file}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(self.embeddings, dtype=np.float32))
+        os.replace(tmp_path, index_dir / embeddings_file)
+
+        manifest = dict(self.manifest, embeddings_file=embeddings_file)
+        tmp_manifest = index_dir / f".{MANIFEST_FILE}.tmp"
+        tmp_manifest.write_text(json.dumps(manifest, ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp_manifest, index_dir / MANIFEST_FILE)
+        self.manifest = manifest
+
+        # 이전 버전 파일 정리 (임베딩, ANN 인덱스 등 버전이 붙은 파일; 열려 있는 mmap은 그대로 유지됨)
+        for stale in index_dir.iterdir():
+            if stale.is_file() and not stale.name.startswith('.') and stale.name != MANIFEST_FILE \
+                    and self.catalog_version not in stale.name:
+                stale.unlink(missing_ok=True)
+        logger.info(f"Saved lab index {self.catalog_version} to {index_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the persisted lab embedding index")
+    parser.add_argument("command", choices=["build", "info", "bench"])
+    parser.add_argument("--data-path", default="../labfinder/src/app/database/labsData.ts")
+    parser.add_argument("--model", default="all-mpnet-base-v2")
+    parser.add_argument("--index-dir", default=None)
+    parser.add_argument("--force", action="store_true", help="re-encode even if the bundle is up to date")
+    parser.add_argument("--queries", type=int, default=200, help="bench: number of sampled lab keyword queries")
+    parser.add_argument("--k", type=int, default=10, help="bench: recall@k cutoff")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        index_dir = args.index_dir or os.getenv("LAB_INDEX_DIR", DEFAULT_INDEX_DIR)
+        bundle = LabIndexBundle.load(index_dir)
+        if bundle is None:
+            print(f"No lab index at {index_dir}")
+            return
+        info = {k: v for k, v in bundle.manifest.items() if k not in ("lab_ids", "lab_hashes")}
+        print(json.dumps(info, indent=2, ensure_ascii=False))
+        return
+
+    from lab_matcher import LabMatcher
+
+    started = time.perf_counter()
+    matcher = LabMatcher(
+        data_path=args.data_path,
+        model_name=args.model,
+        index_dir=args.index_dir,
+        rebuild_index=args.force
+    )
+    print(f"Lab index {matcher.catalog_version} ready "
+          f"({len(matcher.labs_data)} labs, {time.perf_counter() - started:.1f}s)")
+
+    if args.command == "bench":
+        from ann_index import benchmark_modes
+
+        # 연구실 키워드 문자열을 사용자 질의 대용으로 사용
+        rng = np.random.default_rng(0)
+        rows = rng.choice(len(matcher.labs_data), min(args.queries, len(matcher.labs_data)), replace=False)
+        queries = matcher.encoder.encode([matcher.labs_data[int(row)].keywords for row in rows])
+        print(f"{'mode':<8} {'rescore':>7} {'memory MB':>10} {'p50 ms':>8} {'recall@' + str(args.k):>10}")
+        for row in benchmark_modes(matcher.lab_embeddings, queries, k=args.k):
+            print(f"{row['mode']:<8} {row['rescore']:>7} {row['memory_mb']:>10.2f} "
+                  f"{row['latency_ms']:>8.3f} {row[f'recall@{args.k}']:>10.3f}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,103 +1,276 @@
+import base64
+import hashlib
 import json
 import os
 import logging
-from typing import List, Dict, Any
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from pathlib import Path
-import re
-import json5
-from sentence_transformers import SentenceTransformer, util
+import numpy as np
+from sentence_transformers import SentenceTransformer
+from encoders import QueryEncoder, SentenceTransformerEncoder, check_dimension, create_query_encoder
+from lab_index import LabIndexBundle, DEFAULT_INDEX_DIR, MANIFEST_FILE, TEXT_RECIPE, build_lab_text, lab_content_hash
+from catalog_snapshot import CatalogSnapshot, parse_labs_ts
+from ann_index import VectorIndex, build_vector_index, select_top_k
+from cache import NO_FILTER, FacetFilter, LRUCache, QueryKey, normalize_filter, normalize_query, query_text
+from multi_vector import MultiVectorIndex, MultiVectorStore
+from lexical_index import BM25Index, prepare_lexical_index, reciprocal_rank_fusion, tokenize
+from lab_search import LabSearchIndex, make_snippet, prepare_search_index
+from lab_store import RECORD_FIELDS, Lab, LabStore
+from lab_payloads import LabPayload, LabPayloads
+from diversify import DIVERSITY_CANDIDATES, DiversityPolicy, diversify, diversity_policy, is_active
+
+try:
+    import fcntl
+except ImportError:  # Windows에서는 프로세스 간 빌드 잠금 없이 동작
+    fcntl = None
 
 # 로깅 설정
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# Lab 타입 정의 (page.tsx와 일치)
-class Lab:
-    def __init__(self, id: str, name: str, major: str, university: str, keywords: str, introduction: str):
-        self.id = id
-        self.name = name
-        self.major = major
-        self.university = university
-        self.keywords = keywords
-        self.introduction = introduction
-
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "name": self.name,
-            "major": self.major,
-            "university": self.university,
-            "keywords": self.keywords,
-            "introduction": self.introduction
-        }
+# 이 점수 이하의 연구실은 추천에서 제외
+MIN_SIMILARITY = 0.05
+
+RETRIEVAL_MODES = ("dense", "hybrid", "lexical")
+
+# 하이브리드 검색에서 융합 전 점수 (dense 코사인, BM25 원점수); 하이브리드가 아니면 응답에 없음
+SCORE_COMPONENTS = ("dense_score", "lexical_score")
+
+# 추천 응답에서 고를 수 있는 필드와 미리 정한 묶음 (compact는 소개글 대신 짧은 스니펫)
+RECOMMEND_FIELDS = RECORD_FIELDS + ("snippet", "similarity_score") + SCORE_COMPONENTS
+RECOMMEND_VIEWS = {
+    "full": RECORD_FIELDS + ("similarity_score",) + SCORE_COMPONENTS,
+    "compact": ("id", "slug", "name", "major", "university", "keywords", "snippet", "similarity_score"),
+}
+
+
+class StaleCursorError(Exception):
+    """A paging cursor was issued for an older catalog version"""
+
+
+def recommendation_fields(view: str = "full", fields: Optional[Sequence[str]] = None) -> Tuple[str, ...]:
+    """Fields to return: those of ``view``, or exactly ``fields`` when given (ValueError on unknown names)"""
+    if view not in RECOMMEND_VIEWS:
+        raise ValueError(f"unknown view '{view}' (expected one of: {', '.join(RECOMMEND_VIEWS)})")
+    if not fields:
+        return RECOMMEND_VIEWS[view]
+    unknown = [field for field in fields if field not in RECOMMEND_FIELDS]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)} (expected any of: {', '.join(RECOMMEND_FIELDS)})")
+    return tuple(dict.fromkeys(fields))
+
+
+class RankedLabs:
+    """Ranked rows and scores of one recommendation query (what the response cache holds).
+
+    Keeps the ``CatalogState`` the rows index into, so pages rendered after
+    a catalog swap still read the labs the ranking was computed against.
+    """
+
+    __slots__ = ("state", "key", "rows", "scores", "components")
+
+    def __init__(self, state, key, rows: np.ndarray, scores: np.ndarray, components: Optional[np.ndarray] = None):
+        self.state = state
+        self.key = key
+        self.rows = rows
+        self.scores = scores
+        # (len(rows), 2) 배열: SCORE_COMPONENTS 순서의 융합 전 점수 (하이브리드 검색일 때만)
+        self.components = components
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _digest(self) -> str:
+        # 카탈로그 버전을 뺀 질의 키 (버전 불일치는 따로 구분해서 알려줌)
+        qkey, top_n, _, facet_filter, policy = self.key
+        return hashlib.blake2b(repr((qkey, top_n, facet_filter, policy)).encode('utf-8'), digest_size=8).hexdigest()
+
+    def cursor(self, offset: int) -> str:
+        """Opaque cursor for the page starting at ``offset``"""
+        token = json.dumps({"v": self.state.catalog_version, "q": self._digest(), "o": offset}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(token.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def offset_of(self, cursor: str) -> int:
+        """Offset encoded in ``cursor``
+
+        Raises ValueError for a malformed cursor or one issued for a different
+        query, and StaleCursorError if the catalog was reloaded since.
+        """
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            version, digest, offset = data["v"], data["q"], int(data["o"])
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError("malformed cursor") from e
+        if digest != self._digest() or offset < 0:
+            raise ValueError("cursor belongs to a different query")
+        if version != self.state.catalog_version:
+            raise StaleCursorError(f"cursor is for catalog {version}, now serving {self.state.catalog_version}")
+        return offset
+
+class CatalogState:
+    """Everything derived from one catalog version.
+
+    Request handlers read ``LabMatcher._state`` once and use that object
+    throughout, so a reload can swap in a new state with one assignment
+    without blocking or confusing in-flight requests.
+    """
+
+    def __init__(
+        self,
+        labs: LabStore,
+        lab_hashes: Optional[List[str]],
+        bundle: Optional[LabIndexBundle],
+        vector_index: Optional[VectorIndex],
+        lexical_index: Optional[BM25Index] = None,
+        search_index: Optional[LabSearchIndex] = None
+    ):
+        self.labs = labs
+        self.lab_hashes = lab_hashes
+        self.bundle = bundle
+        self.embeddings = bundle.embeddings if bundle is not None else None
+        self.vector_index = vector_index
+        self.lexical_index = lexical_index
+        # 데이터베이스 페이지 검색용 접두어 토큰 인덱스 + 패싯
+        self.search_index = search_index if search_index is not None else LabSearchIndex.build(labs)
+        self.lab_ids = labs.ids
+        # 상세 페이지 응답 본문 (이 카탈로그 버전 동안 한 번만 직렬화)
+        self.payloads = LabPayloads(labs)
+
+    @property
+    def catalog_version(self) -> Optional[str]:
+        return self.bundle.catalog_version if self.bundle is not None else None
 
 class LabMatcher:
     def __init__(
         self,
         data_path: str = "../labfinder/src/app/database/labsData.ts",
-        model_name: str = 'all-mpnet-base-v2'
+        model_name: str = 'all-mpnet-base-v2',
+        index_dir: Optional[str] = None,
+        rebuild_index: bool = False
     ):
         self.data_path = os.path.abspath(data_path)
         logger.info(f"Looking for lab data at: {self.data_path}")
-        self.labs_data: List[Lab] = []
 
-        logger.info(f"Loading SBERT model '{model_name}'...")
-        self.sbert = SentenceTransformer(model_name)
-        self.lab_embeddings = None
+        self.model_name = model_name
+        self.index_dir = Path(index_dir or os.getenv("LAB_INDEX_DIR", DEFAULT_INDEX_DIR))
+        # 여러 uvicorn 워커가 같은 인덱스 디렉터리를 공유하는 모드 (serve.py에서 설정)
+        self.shared = os.getenv("LAB_SHARED_INDEX", "0") == "1"
+        # 키워드 벡터 + 소개글 청크 벡터로 연구실을 표현하는 모드
+        self.multi_vector = os.getenv("LAB_MULTI_VECTOR", "0") == "1"
+        # 후보 생성 방식: dense(SBERT), hybrid(BM25 + SBERT 융합), lexical(BM25만)
+        self.retrieval_mode = os.getenv("LAB_RETRIEVAL_MODE", "dense").lower()
+        if self.retrieval_mode not in RETRIEVAL_MODES:
+            logger.warning(f"Unknown retrieval mode '{self.retrieval_mode}', using dense")
+            self.retrieval_mode = "dense"
+        self.fusion = os.getenv("LAB_FUSION", "rrf").lower()
+        self.rrf_k = int(os.getenv("LAB_RRF_K", "60"))
+        self.lexical_weight = float(os.getenv("LAB_LEXICAL_WEIGHT", "0.3"))
+        self.hybrid_candidates = int(os.getenv("LAB_HYBRID_CANDIDATES", "100"))
 
-        self.load_labs_data()
-        if not self.labs_data:
-            logger.warning("No lab data found, loading dummy data...")
-            self._load_dummy_data()
-        self._prepare_embeddings()
+        # 질의 인코더는 배포별로 선택 (LAB_ENCODER_BACKEND); 연구실 임베딩은 항상 기준 모델로 생성
+        logger.info(f"Loading query encoder for '{model_name}'...")
+        self.encoder: QueryEncoder = create_query_encoder(model_name)
+        self._sbert: Optional[SentenceTransformer] = None
+        if isinstance(self.encoder, SentenceTransformerEncoder) and self.encoder.name == "torch":
+            self._sbert = self.encoder.model
+        logger.info(f"Query encoder: {self.encoder.describe()}")
+
+        # 질의 임베딩 캐시(모델 기준)와 응답 캐시(카탈로그 버전 기준)
+        self.query_cache = LRUCache(int(os.getenv("LAB_QUERY_CACHE_SIZE", "4096")), "query_embeddings")
+        self.response_cache = LRUCache(int(os.getenv("LAB_RESPONSE_CACHE_SIZE", "1024")), "responses")
+        self._response_cache_version: Optional[str] = None
 
-    def load_labs_data(self):
-        """Load lab data from TypeScript file"""
+        # 카탈로그 핫 리로드 상태
+        self._reload_lock = threading.Lock()
+        self._reload_thread: Optional[threading.Thread] = None
+        self._watch_thread: Optional[threading.Thread] = None
+        self.last_reload: Dict[str, Any] = {}
+
+        self._state = self._build_state(rebuild=rebuild_index)
+        self._check_encoder_dimension()
+
+    def _check_encoder_dimension(self) -> None:
+        """Fall back to the reference encoder if the configured one does not match the index dimension"""
+        embeddings = self._state.embeddings
+        if embeddings is None or self.encoder.name == "torch":
+            return
+        try:
+            check_dimension(self.encoder, int(embeddings.shape[1]))
+        except ValueError as e:
+            logger.error(f"Query encoder does not match the lab index, using torch: {str(e)}")
+            self.encoder = SentenceTransformerEncoder(self.model_name, self._sbert)
+            self._sbert = self.encoder.model
+
+    # 현재 상태에 대한 읽기 전용 접근자
+    @property
+    def labs_data(self) -> LabStore:
+        return self._state.labs
+
+    @property
+    def lab_embeddings(self) -> Optional[np.ndarray]:
+        return self._state.embeddings
+
+    @property
+    def vector_index(self) -> Optional[VectorIndex]:
+        return self._state.vector_index
+
+    @property
+    def index_bundle(self) -> Optional[LabIndexBundle]:
+        return self._state.bundle
+
+    @property
+    def sbert(self) -> SentenceTransformer:
+        """Reference model for lab descriptions, loaded only when some lab needs encoding"""
+        if self._sbert is None:
+            logger.info(f"Loading SBERT model '{self.model_name}'...")
+            self._sbert = SentenceTransformer(self.model_name)
+        return self._sbert
+
+    @property
+    def catalog_version(self) -> Optional[str]:
+        """Version of the lab index currently being served"""
+        return self._state.catalog_version
+
+    def _read_catalog(self) -> Tuple[Optional[LabStore], Optional[List[str]]]:
+        """Load lab data from the compiled catalog snapshot, recompiling it from the TypeScript file if stale"""
         try:
             ts_file = Path(self.data_path)
             if not ts_file.exists():
                 logger.error(f"Data file not found: {ts_file}")
-                return
+                return None, None
 
-            content = ts_file.read_text(encoding='utf-8')
-            logger.debug(f"File content length: {len(content)}")
-            
-            pattern = re.compile(
-                r'export\s+const\s+labs\s*:\s*Lab\[\]\s*=\s*'
-                r'(\[\s*[\s\S]*?\])\s*;',
-                re.MULTILINE
-            )
-            m = pattern.search(content)
-            if not m:
-                logger.error("No lab data pattern found in file")
-                return
+            snapshot_dir = self.index_dir / "catalog"
+            snapshot = CatalogSnapshot.load(snapshot_dir)
+            if snapshot is None or not snapshot.is_fresh(ts_file):
+                logger.info("Catalog snapshot missing or stale, parsing TypeScript source...")
+                records = parse_labs_ts(ts_file)
+                hashes = [lab_content_hash(Lab(**record)) for record in records]
+                try:
+                    CatalogSnapshot.write(snapshot_dir, ts_file, records, hashes)
+                    snapshot = CatalogSnapshot.load(snapshot_dir)
+                except OSError as e:
+                    logger.warning(f"Could not write catalog snapshot: {str(e)}")
+                    snapshot = None
+                if snapshot is None:
+                    labs = LabStore.from_records(records, hashes)
+                    logger.info(f"Successfully loaded {len(labs)} labs")
+                    return labs, hashes
 
-            json_str = m.group(1)
-            logger.debug(f"Extracted JSON string length: {len(json_str)}")
-            
-            raw_data = json5.loads(json_str)
-            self.labs_data = [
-                Lab(
-                    id=item.get("id", ""),
-                    name=item.get("name", ""),
-                    major=item.get("major", ""),
-                    university=item.get("university", ""),
-                    keywords=item.get("keywords", ""),
-                    introduction=item.get("introduction", "")
-                )
-                for item in raw_data
-            ]
-            logger.info(f"Successfully loaded {len(self.labs_data)} labs")
-            logger.debug(f"First lab data: {self.labs_data[0].to_dict() if self.labs_data else 'No labs'}")
+            # 스냅샷을 그대로 mmap해서 사용 (워커 간 페이지 캐시 공유)
+            logger.info(f"Loaded catalog snapshot {snapshot.version} ({len(snapshot)} labs)")
+            return LabStore(snapshot), snapshot.lab_hashes()
             
         except Exception as e:
             logger.error(f"Error loading lab data: {str(e)}")
-            self.labs_data = []
+            return None, None
 
-    def _load_dummy_data(self):
+    def _load_dummy_data(self) -> List[Lab]:
         """Load dummy data if no real data is available"""
         logger.info("Loading dummy lab data...")
-        self.labs_data = [
+        return [
             Lab(
                 id="dummy-1",
                 name="AI Research Lab",
@@ -116,62 +289,418 @@ class LabMatcher:
             )
         ]
 
-    def _prepare_embeddings(self):
-        """Prepare SBERT embeddings for all labs"""
-        if not self.labs_data:
-            logger.error("No lab data available for embedding")
+    @contextmanager
+    def _build_lock(self):
+        """Serialize index builds across worker processes sharing ``index_dir``
+
+        The first worker to start (or reload) encodes and writes the bundle;
+        the others wait here, then find it up to date and just map it.
+        """
+        if fcntl is None:
+            yield
             return
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.index_dir / ".build.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
 
-        try:
-            lab_texts = []
-            for lab in self.labs_data:
-                text_parts = [
-                    lab.major,
-                    lab.keywords,
-                    lab.introduction
-                ]
-                lab_texts.append(' '.join(filter(None, text_parts)))
-                logger.debug(f"Prepared text for lab {lab.name}: {text_parts}")
-
-            logger.info(f"Encoding {len(lab_texts)} lab descriptions...")
-            self.lab_embeddings = self.sbert.encode(
-                lab_texts,
-                convert_to_tensor=True,
-                show_progress_bar=True
+    def _build_state(self, rebuild: bool = False, previous: Optional[CatalogState] = None) -> CatalogState:
+        """Load the catalog and everything derived from it into a new CatalogState"""
+        with self._build_lock():
+            return self._build_state_locked(rebuild, previous)
+
+    def _build_state_locked(self, rebuild: bool, previous: Optional[CatalogState]) -> CatalogState:
+        labs, hashes = self._read_catalog()
+        if not labs:
+            logger.warning("No lab data found, loading dummy data...")
+            dummy = self._load_dummy_data()
+            hashes = [lab_content_hash(lab) for lab in dummy]
+            labs = LabStore.from_records([lab.to_dict() for lab in dummy], hashes)
+
+        bundle, encoded = self._prepare_embeddings(labs, hashes, rebuild, previous)
+        vector_index = None
+        if bundle is not None and self.multi_vector:
+            vector_index = self._prepare_multi_vector(labs, hashes, bundle, rebuild, previous)
+        if bundle is not None and vector_index is None:
+            vector_index = build_vector_index(
+                bundle.embeddings,
+                cache_dir=self.index_dir,
+                version=bundle.catalog_version
             )
-            logger.info("Lab embeddings prepared successfully")
+        if vector_index is not None:
+            logger.info(f"Lab embeddings prepared successfully ({vector_index.name} index, {encoded} encoded)")
+        lexical_index = search_index = None
+        if bundle is not None:
+            if self.retrieval_mode != "dense":
+                lexical_index = prepare_lexical_index(labs, self.index_dir, bundle.catalog_version)
+            search_index = prepare_search_index(labs, self.index_dir, bundle.catalog_version)
+        self.last_encoded = encoded
+        return CatalogState(labs, hashes, bundle, vector_index, lexical_index, search_index)
+
+    def _prepare_embeddings(
+        self,
+        labs: Sequence[Lab],
+        hashes: List[str],
+        rebuild: bool = False,
+        previous: Optional[CatalogState] = None
+    ) -> Tuple[Optional[LabIndexBundle], int]:
+        """Load lab embeddings from the index bundle, re-encoding only new or changed labs
+
+        Returns the bundle and the number of labs that had to be encoded.
+        """
+        if not labs:
+            logger.error("No lab data available for embedding")
+            return None, 0
+
+        try:
+            stored = None if rebuild else LabIndexBundle.load(self.index_dir)
+            if stored is not None and stored.matches(self.model_name, labs, hashes):
+                logger.info(f"Loaded lab index {stored.catalog_version} from {self.index_dir}")
+                return stored, 0
+
+            # 같은 모델/레시피로 만든 기존 임베딩 중 id와 내용 해시가 같은 행은 재사용
+            reference = previous.bundle if previous is not None and previous.bundle is not None else stored
+            reusable: Dict[Tuple[str, str], int] = {}
+            if reference is not None and not rebuild and reference.model_name == self.model_name \
+                    and reference.manifest.get("text_recipe") == TEXT_RECIPE:
+                reusable = {
+                    key: row for row, key in enumerate(zip(reference.lab_ids, reference.manifest["lab_hashes"]))
+                }
+            rows = [reusable.get((lab.id, lab_hash)) for lab, lab_hash in zip(labs, hashes)]
+            missing = [i for i, row in enumerate(rows) if row is None]
+            reused = [i for i, row in enumerate(rows) if row is not None]
+
+            encoded = None
+            if missing:
+                logger.info(f"Encoding {len(missing)} of {len(labs)} lab descriptions...")
+                encoded = self.sbert.encode(
+                    [build_lab_text(labs[i]) for i in missing],
+                    convert_to_numpy=True,
+                    normalize_embeddings=True,
+                    show_progress_bar=True
+                )
+            dim = encoded.shape[1] if encoded is not None else reference.embeddings.shape[1]
+            embeddings = np.empty((len(labs), dim), dtype=np.float32)
+            if reused:
+                embeddings[reused] = reference.embeddings[[rows[i] for i in reused]]
+            if missing:
+                embeddings[missing] = encoded
+
+            bundle = LabIndexBundle.create(self.model_name, labs, embeddings, hashes)
+            try:
+                bundle.save(self.index_dir)
+                # 저장된 파일을 mmap으로 다시 열어 메모리 사본을 버림
+                bundle = LabIndexBundle.load(self.index_dir) or bundle
+            except OSError as e:
+                logger.warning(f"Could not persist lab index: {str(e)}")
+            return bundle, len(missing)
         except Exception as e:
             logger.error(f"Error preparing embeddings: {str(e)}")
-            self.lab_embeddings = None
+            return None, 0
+
+    def _prepare_multi_vector(
+        self,
+        labs: Sequence[Lab],
+        hashes: List[str],
+        bundle: LabIndexBundle,
+        rebuild: bool,
+        previous: Optional[CatalogState]
+    ) -> Optional[MultiVectorIndex]:
+        """Load or build the keyword + introduction chunk vectors for this catalog version"""
+        try:
+            version = bundle.catalog_version
+            store = None if rebuild else MultiVectorStore.load(self.index_dir, version, self.model_name)
+            if store is None:
+                reference = None
+                if previous is not None and isinstance(previous.vector_index, MultiVectorIndex):
+                    reference = previous.vector_index.store
+                store = MultiVectorStore.build(
+                    lambda texts: self.sbert.encode(
+                        texts,
+                        convert_to_numpy=True,
+                        normalize_embeddings=True,
+                        show_progress_bar=True
+                    ),
+                    labs, hashes, version, self.model_name, reference
+                )
+                try:
+                    store.save(self.index_dir)
+                    store = MultiVectorStore.load(self.index_dir, version, self.model_name) or store
+                except OSError as e:
+                    logger.warning(f"Could not persist multi-vector store: {str(e)}")
+            return MultiVectorIndex(bundle.embeddings, store)
+        except Exception as e:
+            logger.error(f"Error preparing multi-vector index, using single vectors: {str(e)}")
+            return None
+
+    def _source_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.data_path)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns)
+
+    def reload(self, force: bool = False) -> Dict[str, Any]:
+        """Reload the catalog, embed only new/changed labs and swap the new state in atomically"""
+        if not self._reload_lock.acquire(blocking=False):
+            return {"status": "in_progress"}
+        started = time.perf_counter()
+        try:
+            previous = self._state
+            new_state = self._build_state(previous=previous)
+            if new_state.bundle is None:
+                result = {"status": "failed", "version": previous.catalog_version}
+            elif not force and new_state.catalog_version == previous.catalog_version:
+                result = {"status": "unchanged", "version": previous.catalog_version}
+            else:
+                old = dict(zip(previous.lab_ids, previous.lab_hashes or []))
+                new = dict(zip(new_state.lab_ids, new_state.lab_hashes))
+                self._state = new_state
+                result = {
+                    "status": "reloaded",
+                    "previous_version": previous.catalog_version,
+                    "version": new_state.catalog_version,
+                    "labs": len(new_state.labs),
+                    "added": sum(1 for lab_id in new if lab_id not in old),
+                    "changed": sum(1 for lab_id, h in new.items() if lab_id in old and old[lab_id] != h),
+                    "removed": sum(1 for lab_id in old if lab_id not in new),
+                    "encoded": self.last_encoded
+                }
+        except Exception as e:
+            logger.error(f"Error reloading catalog: {str(e)}")
+            result = {"status": "failed", "error": str(e)}
+        finally:
+            self._reload_lock.release()
+
+        result["duration_s"] = round(time.perf_counter() - started, 3)
+        result["finished_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.last_reload = result
+        logger.info(f"Catalog reload: {result}")
+        return result
+
+    def start_reload(self, force: bool = False) -> bool:
+        """Run reload() in a background thread; False if one is already running"""
+        if self._reload_thread is not None and self._reload_thread.is_alive():
+            return False
+        self._reload_thread = threading.Thread(
+            target=self.reload, kwargs={"force": force}, daemon=True, name="catalog-reload"
+        )
+        self._reload_thread.start()
+        return True
+
+    def _index_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.index_dir / MANIFEST_FILE)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns)
+
+    def start_watching(self, interval: float) -> None:
+        """Poll the catalog source file and reload when it changes
+
+        In shared mode the bundle manifest is watched too, so workers pick up
+        an index that another worker rebuilt (e.g. via the admin endpoint).
+        """
+        if interval <= 0 or self._watch_thread is not None:
+            return
+
+        def signatures():
+            return (self._source_signature(), self._index_signature() if self.shared else None)
+
+        def watch():
+            signature = signatures()
+            while True:
+                time.sleep(interval)
+                current = signatures()
+                if current[0] is not None and current != signature:
+                    signature = current
+                    logger.info("Catalog source or shared index changed, reloading...")
+                    self.reload()
+                    # 자신이 다시 쓴 매니페스트 때문에 한 번 더 리로드하지 않도록 갱신
+                    signature = signatures()
+
+        self._watch_thread = threading.Thread(target=watch, daemon=True, name="catalog-watch")
+        self._watch_thread.start()
+        logger.info(f"Watching {self.data_path} for changes every {interval}s")
+
+    def reload_status(self) -> Dict[str, Any]:
+        return {
+            "in_progress": self._reload_lock.locked(),
+            "version": self.catalog_version,
+            "last_reload": self.last_reload
+        }
+
+    def _encode_queries(self, keys: List[QueryKey]) -> np.ndarray:
+        """Embed normalized queries, encoding all cache misses in one forward pass"""
+        embeddings = {key: self.query_cache.get(key) for key in dict.fromkeys(keys)}
+        missing = [key for key, emb in embeddings.items() if emb is None]
+        if missing:
+            texts = [query_text(key) for key in missing]
+            logger.info(f"Encoding {len(texts)} queries: {texts[:3]}")
+            encoded = self.encoder.encode(texts, batch_size=max(32, len(texts)))
+            for key, emb in zip(missing, encoded):
+                emb = np.array(emb, dtype=np.float32)
+                emb.flags.writeable = False
+                self.query_cache.put(key, emb)
+                embeddings[key] = emb
+        return np.stack([embeddings[key] for key in keys])
+
+    def _encode_query(self, cv_keywords: List[str], user_major: str = "") -> np.ndarray:
+        """Embed a single keyword query"""
+        return self._encode_queries([normalize_query(cv_keywords, user_major)])[0]
+
+    def _materialize(self, state: CatalogState, ids: np.ndarray, scores: np.ndarray) -> List[Dict[str, Any]]:
+        """Build result dicts for the returned labs only"""
+        keep = scores > MIN_SIMILARITY
+        return [
+            {**state.labs.record(idx), "similarity_score": score}
+            for idx, score in zip(ids[keep].tolist(), scores[keep].tolist())
+        ]
+
+    def _retrieve(
+        self,
+        state: CatalogState,
+        keys: List[QueryKey],
+        k: int,
+        rows: Optional[np.ndarray] = None
+    ) -> List[Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]]:
+        """Top-``k`` (rows, scores, components) per query using the configured retrieval mode
+
+        ``scores`` is what the ranking is ordered by; ``components`` holds
+        the dense and BM25 scores behind a hybrid ranking (None otherwise).
+        ``rows`` restricts retrieval to those sorted lab rows (university/major
+        filters); only they are scored.
+        """
+        if rows is not None and not len(rows):
+            empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), None)
+            return [empty for _ in keys]
+        if self.retrieval_mode == "dense" or state.lexical_index is None:
+            return [
+                (ids, scores, None)
+                for ids, scores in self._dense_search(state, self._encode_queries(keys), k, rows)
+            ]
+        if self.retrieval_mode == "lexical":
+            results = []
+            for key in keys:
+                matched, scores = self._lexical_match(state, query_text(key), rows)
+                top = select_top_k(scores, min(k, len(matched)))
+                matched, scores = matched[top], scores[top]
+                # BM25 점수는 범위가 없으므로 질의별 최고점 기준으로 0~1 정규화
+                results.append((matched, scores / scores[0] if len(scores) else scores, None))
+            return results
+
+        pool = max(k, self.hybrid_candidates)
+        query_embs = self._encode_queries(keys)
+        dense_hits = self._dense_search(state, query_embs, pool, rows)
+        return [
+            self._fuse(state, query_embs[i], query_text(key), dense_hits[i], pool, k, rows)
+            for i, key in enumerate(keys)
+        ]
+
+    @staticmethod
+    def _dense_search(
+        state: CatalogState,
+        query_embs: np.ndarray,
+        k: int,
+        rows: Optional[np.ndarray]
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        if rows is None:
+            return state.vector_index.search(query_embs, k)
+        return state.vector_index.search_rows(query_embs, rows, k)
+
+    @staticmethod
+    def _lexical_match(state: CatalogState, text: str, rows: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """BM25 matches for ``text``, limited to ``rows`` when filtering"""
+        matched, scores = state.lexical_index.match(text)
+        if rows is not None and len(matched):
+            keep = np.isin(matched, rows, assume_unique=True)
+            matched, scores = matched[keep], scores[keep]
+        return matched, scores
+
+    def _fuse(
+        self,
+        state: CatalogState,
+        query_emb: np.ndarray,
+        text: str,
+        dense_hit: Tuple[np.ndarray, np.ndarray],
+        pool: int,
+        k: int,
+        rows: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Fuse dense and BM25 candidates (RRF or weighted) for one query
+
+        Returns the top-``k`` rows, their fused scores (what they are ordered
+        by, in 0..1) and the raw dense and BM25 score of each.
+        """
+        dense_rows, dense_scores = dense_hit
+        lexical_rows, lexical_scores = self._lexical_match(state, text, rows)
+        top = select_top_k(lexical_scores, min(pool, len(lexical_rows)))
+
+        candidates = np.union1d(dense_rows, lexical_rows[top])
+        # 후보 전체에 대한 dense 점수 (BM25로만 들어온 후보는 정확히 다시 계산)
+        dense_c = np.empty(len(candidates), dtype=np.float32)
+        in_dense = np.isin(candidates, dense_rows)
+        dense_c[np.searchsorted(candidates, dense_rows)] = dense_scores
+        if not in_dense.all():
+            dense_c[~in_dense] = state.vector_index.score_rows(query_emb, candidates[~in_dense])
+        # 후보별 BM25 점수 (매칭되지 않으면 0)
+        lexical_c = np.zeros(len(candidates), dtype=np.float32)
+        if len(lexical_rows):
+            pos = np.searchsorted(lexical_rows, candidates)
+            matched = (pos < len(lexical_rows)) & (lexical_rows[np.minimum(pos, len(lexical_rows) - 1)] == candidates)
+            lexical_c[matched] = lexical_scores[pos[matched]]
+        else:
+            matched = np.zeros(len(candidates), dtype=bool)
+
+        if self.fusion == "weighted":
+            lexical_max = float(lexical_scores.max()) if len(lexical_scores) else 1.0
+            fused = (1.0 - self.lexical_weight) * dense_c + self.lexical_weight * lexical_c / lexical_max
+        else:
+            lexical_order = select_top_k(lexical_c, int(matched.sum()))
+            fused = reciprocal_rank_fusion(
+                [select_top_k(dense_c, len(candidates)), lexical_order], len(candidates), self.rrf_k
+            )
+            # 두 검색 모두 1위일 때의 RRF 점수로 나눠 0~1로 표시 (순위와 표시 점수가 같은 순서)
+            fused /= 2.0 / (self.rrf_k + 1)
+        order = select_top_k(fused, k)
+        return candidates[order], fused[order], np.stack([dense_c[order], lexical_c[order]], axis=1)
+
+    def _rank(self, state: CatalogState, cv_emb: np.ndarray, top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Score labs against a query embedding and materialize the results"""
+        # 임베딩이 정규화되어 있으므로 내적이 곧 코사인 유사도
+        if top_k is not None and state.vector_index is not None:
+            ids, scores = state.vector_index.search(cv_emb, top_k)[0]
+        else:
+            if state.vector_index is not None:
+                all_scores = state.vector_index.score_all(cv_emb)[0]
+            else:
+                all_scores = state.embeddings @ cv_emb
+            ids = np.flatnonzero(all_scores > MIN_SIMILARITY)
+            ids = ids[select_top_k(all_scores[ids], len(ids))]
+            scores = all_scores[ids]
+        return self._materialize(state, ids, scores)
 
     def calculate_similarity(
         self,
         cv_keywords: List[str],
-        user_major: str = ""
+        user_major: str = "",
+        top_k: Optional[int] = None
     ) -> List[Dict[str, Any]]:
-        """Calculate similarity between CV and labs"""
-        if self.lab_embeddings is None:
+        """Calculate similarity between CV and labs
+
+        With ``top_k`` the configured vector index returns only the best
+        ``top_k`` labs; without it every lab is scored exactly.
+        """
+        state = self._state
+        if state.embeddings is None:
             logger.error("Lab embeddings not available")
             return []
 
         try:
-            cv_text = f"{user_major} {' '.join(cv_keywords)}"
-            logger.info(f"Calculating similarity for: {cv_text}")
-
-            cv_emb = self.sbert.encode(cv_text, convert_to_tensor=True)
-            cosine_scores = util.cos_sim(cv_emb, self.lab_embeddings)[0]
-            scores = cosine_scores.cpu().numpy()
-
-            results = []
-            for idx, lab in enumerate(self.labs_data):
-                if scores[idx] > 0.05:
-                    results.append({
-                        **lab.to_dict(),
-                        "similarity_score": float(scores[idx])
-                    })
-                    logger.debug(f"Lab {lab.name} score: {scores[idx]:.4f}")
-
-            results.sort(key=lambda x: x["similarity_score"], reverse=True)
+            results = self._rank(state, self._encode_query(cv_keywords, user_major), top_k)
             logger.info(f"Found {len(results)} matching labs")
             return results
 
@@ -179,22 +708,276 @@ class LabMatcher:
             logger.error(f"Error calculating similarity: {str(e)}")
             return []
 
+    def _response_key(
+        self,
+        state: CatalogState,
+        cv_keywords: List[str],
+        user_major: str,
+        top_n: int,
+        facet_filter: FacetFilter = NO_FILTER,
+        policy: Optional[DiversityPolicy] = None
+    ):
+        """Response cache key; entries from older catalog versions are dropped
+
+        ``policy`` defaults to the server's diversity settings.
+        """
+        version = state.catalog_version
+        if version != self._response_cache_version:
+            self.response_cache.clear()
+            self._response_cache_version = version
+        policy = policy if policy is not None else diversity_policy()
+        return (normalize_query(cv_keywords, user_major), top_n, version, facet_filter, policy)
+
     def get_top_recommendations(
         self,
         cv_keywords: List[str],
         user_major: str = "",
-        top_n: int = 10
+        top_n: int = 10,
+        universities: Optional[List[str]] = None,
+        majors: Optional[List[str]] = None,
+        policy: Optional[DiversityPolicy] = None
     ) -> List[Dict[str, Any]]:
-        """Get top N lab recommendations"""
-        results = self.calculate_similarity(cv_keywords, user_major)
-        return results[:top_n] if results else []
+        """Get top N lab recommendations, optionally only from the given universities/majors"""
+        facet_filter = normalize_filter(universities, majors)
+        return self.get_batch_recommendations([(cv_keywords, user_major, top_n, facet_filter, policy)])[0]
+
+    def get_cached_ranking(
+        self,
+        cv_keywords: List[str],
+        user_major: str = "",
+        top_n: int = 10,
+        universities: Optional[List[str]] = None,
+        majors: Optional[List[str]] = None,
+        policy: Optional[DiversityPolicy] = None
+    ) -> Optional[RankedLabs]:
+        """Return the cached ranking without scoring, or None on a miss"""
+        state = self._state
+        if state.embeddings is None:
+            return None
+        facet_filter = normalize_filter(universities, majors)
+        return self.response_cache.get(
+            self._response_key(state, cv_keywords, user_major, top_n, facet_filter, policy)
+        )
+
+    def rank_batch(self, queries: List[Tuple]) -> List[RankedLabs]:
+        """Rank labs for many (keywords, user_major, top_n, filter[, policy]) queries
+
+        Uncached queries are encoded in one batched call per filter and
+        scored with a single matrix multiply against the eligible labs; the
+        filter is a ``normalize_filter`` key (``NO_FILTER`` for every lab).
+        With an active diversity ``policy`` a larger candidate pool is
+        retrieved and re-ranked with university/major caps and MMR.
+        Rankings (row ids and scores, not lab dicts) are cached per query.
+        """
+        state = self._state
+        keys = [self._response_key(state, *query) for query in queries]
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+        if state.embeddings is None:
+            logger.error("Lab embeddings not available")
+            return [RankedLabs(state, key, *empty) for key in keys]
+
+        results = [self.response_cache.get(key) for key in keys]
+        pending = [i for i, cached in enumerate(results) if cached is None]
+
+        groups: Dict[FacetFilter, List[int]] = {}
+        for i in pending:
+            groups.setdefault(keys[i][3], []).append(i)
+        for facet_filter, members in groups.items():
+            try:
+                rows = state.search_index.eligible_rows(*facet_filter)
+                max_k = max(self._candidate_count(keys[i][1], keys[i][4]) for i in members)
+                hits = self._retrieve(state, [keys[i][0] for i in members], max_k, rows)
+                for i, (ids, scores, components) in zip(members, hits):
+                    top_n, policy = keys[i][1], keys[i][4]
+                    keep = np.flatnonzero(scores > MIN_SIMILARITY)
+                    if is_active(policy):
+                        keep = keep[self._diversify(state, ids[keep], scores[keep], top_n, policy)]
+                    keep = keep[:top_n]
+                    ranked = RankedLabs(
+                        state, keys[i], ids[keep], scores[keep],
+                        components[keep] if components is not None else None
+                    )
+                    self.response_cache.put(keys[i], ranked)
+                    results[i] = ranked
+            except Exception as e:
+                logger.error(f"Error calculating similarity: {str(e)}")
+                for i in members:
+                    results[i] = RankedLabs(state, keys[i], *empty)
+
+        return results
+
+    @staticmethod
+    def _candidate_count(top_n: int, policy: DiversityPolicy) -> int:
+        return max(top_n, DIVERSITY_CANDIDATES) if is_active(policy) else top_n
+
+    @staticmethod
+    def _diversify(
+        state: CatalogState,
+        ids: np.ndarray,
+        scores: np.ndarray,
+        top_n: int,
+        policy: DiversityPolicy
+    ) -> np.ndarray:
+        """Re-rank retrieved candidates with the policy's caps and MMR; returns candidate positions"""
+        search_index = state.search_index
+        vectors = state.embeddings[ids] if policy[2] < 1.0 else None
+        order = diversify(
+            scores, top_n, policy,
+            university_codes=search_index.university_codes[ids],
+            major_codes=search_index.major_codes[ids],
+            vectors=vectors
+        )
+        return order
+
+    def render(
+        self,
+        ranked: RankedLabs,
+        fields: Sequence[str] = RECOMMEND_VIEWS["full"],
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Result dicts for ``ranked[offset:offset + limit]`` holding only ``fields``
+
+        Only the requested catalog fields are decoded, so views without the
+        introduction never inflate it.
+        """
+        end = len(ranked) if limit is None else offset + limit
+        labs = ranked.state.labs
+        lab_fields = [field for field in fields if field in RECORD_FIELDS]
+        with_snippet = "snippet" in fields
+        with_score = "similarity_score" in fields
+        # 하이브리드가 아닌 순위에는 융합 전 점수가 없으므로 해당 필드를 생략
+        component_fields = [
+            (j, field) for j, field in enumerate(SCORE_COMPONENTS)
+            if field in fields and ranked.components is not None
+        ]
+        components = ranked.components[offset:end].tolist() if component_fields else None
+        tokens = list(dict.fromkeys(tokenize(query_text(ranked.key[0])))) if with_snippet else []
+        results = []
+        for n, (row, score) in enumerate(zip(ranked.rows[offset:end].tolist(), ranked.scores[offset:end].tolist())):
+            item = labs.record(row, lab_fields)
+            if with_snippet:
+                item["snippet"] = make_snippet(labs.get("introduction", row), tokens)["snippet"]
+            if with_score:
+                item["similarity_score"] = score
+            for j, field in component_fields:
+                item[field] = components[n][j]
+            results.append(item)
+        return results
+
+    def get_batch_recommendations(
+        self,
+        queries: List[Tuple],
+        fields: Optional[List[Sequence[str]]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Get top N recommendations for many queries, optionally projecting each to its ``fields``"""
+        rankings = self.rank_batch(queries)
+        if fields is None:
+            return [self.render(ranked) for ranked in rankings]
+        return [self.render(ranked, item_fields) for ranked, item_fields in zip(rankings, fields)]
+
+    def warm_up(self, queries: List[Dict[str, Any]]) -> int:
+        """Pre-populate both caches from a list of popular queries"""
+        warmed = 0
+        for query in queries:
+            keywords = query.get("keywords") or []
+            if not keywords:
+                continue
+            self.get_top_recommendations(
+                keywords,
+                user_major=query.get("user_major", ""),
+                top_n=int(query.get("top_n", 10)),
+                universities=query.get("universities"),
+                majors=query.get("majors"),
+                policy=diversity_policy(
+                    query.get("max_per_university"), query.get("max_per_major"), query.get("mmr_lambda")
+                )
+            )
+            warmed += 1
+        logger.info(f"Warmed recommendation caches with {warmed} queries")
+        return warmed
+
+    def search_labs(
+        self,
+        query: str = "",
+        university: str = "",
+        major: str = "",
+        page: int = 1,
+        page_size: int = 20
+    ) -> Dict[str, Any]:
+        """Paginated catalog search with facet counts and highlighted introduction snippets"""
+        state = self._state
+        found = state.search_index.search(query, university, major, page, page_size)
+        labs = []
+        for row in found["rows"]:
+            lab = state.labs[row]
+            labs.append({
+                "id": lab.id,
+                "name": lab.name,
+                "major": lab.major,
+                "university": lab.university,
+                "keywords": lab.keywords,
+                **make_snippet(lab.introduction, found["tokens"])
+            })
+        return {
+            "total": found["total"],
+            "page": page,
+            "page_size": page_size,
+            "labs": labs,
+            "facets": found["facets"]
+        }
+
+    def retrieval_stats(self) -> Dict[str, Any]:
+        lexical_index = self._state.lexical_index
+        return {
+            "mode": self.retrieval_mode,
+            "fusion": self.fusion if self.retrieval_mode == "hybrid" else None,
+            "lexical_index": lexical_index.stats() if lexical_index is not None else None
+        }
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return {
+            "query_embeddings": self.query_cache.stats(),
+            "responses": self.response_cache.stats()
+        }
 
     def get_lab_by_id(self, lab_id: str) -> Dict[str, Any]:
         """Get lab information by ID"""
-        for lab in self.labs_data:
-            if lab.id == lab_id:
-                return lab.to_dict()
-        return None
+        state = self._state
+        row = state.labs.row_of(lab_id)
+        return state.labs.record(row) if row is not None else None
+
+    def get_lab_by_slug(self, slug: str) -> Optional[Dict[str, Any]]:
+        """Get lab information by name slug (duplicate names get ``-2``, ``-3``, ... in catalog order)"""
+        state = self._state
+        row = state.labs.row_for_slug(slug)
+        return state.labs.record(row) if row is not None else None
+
+    def get_lab_payload_by_id(self, lab_id: str) -> Optional[LabPayload]:
+        """Pre-serialized detail response for a lab id"""
+        state = self._state
+        row = state.labs.row_of(lab_id)
+        return state.payloads.get(row) if row is not None else None
+
+    def get_lab_payload_by_slug(self, slug: str) -> Optional[LabPayload]:
+        """Pre-serialized detail response for a lab slug"""
+        state = self._state
+        row = state.labs.row_for_slug(slug)
+        return state.payloads.get(row) if row is not None else None
+
+    def memory_stats(self) -> Dict[str, Any]:
+        """How the catalog and embeddings are held in this process"""
+        state = self._state
+        embeddings = state.embeddings
+        snapshot = state.labs.snapshot
+        return {
+            "shared_index": self.shared,
+            "embeddings_bytes": int(embeddings.nbytes) if embeddings is not None else 0,
+            "embeddings_mmap": isinstance(embeddings, np.memmap),
+            "catalog_bytes": snapshot.nbytes(),
+            "catalog_mmap": snapshot.mapped,
+            "lab_payloads": state.payloads.stats()
+        }
 
 
 if __name__ == "__main__":
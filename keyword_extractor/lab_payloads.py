@@ -0,0 +1,118 @@
+import gzip
+import hashlib
+import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# 이보다 작은 응답은 gzip 이득보다 헤더/CPU 비용이 커서 그대로 보냄
+GZIP_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+
+
+class LabPayload:
+    """One lab's ``{"success": true, "lab": ...}`` response body, serialized once"""
+
+    __slots__ = ("body", "etag", "_gzip_body", "_lock")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        self._gzip_body: Optional[bytes] = None
+        self._lock = threading.Lock()
+
+    @property
+    def gzip_etag(self) -> str:
+        # 인코딩이 다르면 강한 ETag도 달라야 함 (Apache mod_deflate와 같은 접미사 방식)
+        return self.etag[:-1] + '-gzip"'
+
+    @property
+    def compressible(self) -> bool:
+        return len(self.body) >= GZIP_MIN_BYTES
+
+    @property
+    def gzip_body(self) -> bytes:
+        if self._gzip_body is None:
+            with self._lock:
+                if self._gzip_body is None:
+                    # mtime=0으로 고정해 같은 본문은 항상 같은 바이트가 되도록 함
+                    self._gzip_body = gzip.compress(self.body, GZIP_LEVEL, mtime=0)
+        return self._gzip_body
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Whether an If-None-Match header matches either encoding of this payload"""
+        if not if_none_match:
+            return False
+        tags = {tag.strip() for tag in if_none_match.split(',')}
+        if "*" in tags:
+            return True
+        # If-None-Match는 약한 비교 (W/ 접두사 무시)
+        tags = {tag[2:] if tag.startswith("W/") else tag for tag in tags}
+        return self.etag in tags or self.gzip_etag in tags
+
+
+class LabPayloads:
+    """Per-catalog-version cache of serialized lab detail responses, keyed by row.
+
+    Bodies are built on the first request for a lab and kept until the
+    catalog is swapped (a new ``CatalogState`` gets a new cache), so the
+    cache is bounded by the catalog size and never needs invalidation.
+    """
+
+    def __init__(self, labs):
+        self.labs = labs
+        self._payloads: Dict[int, LabPayload] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, row: int) -> LabPayload:
+        payload = self._payloads.get(row)
+        if payload is not None:
+            self.hits += 1
+            return payload
+        self.misses += 1
+        # JSONResponse.render와 같은 직렬화 옵션
+        body = json.dumps(
+            {"success": True, "lab": self.labs.record(row)},
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(",", ":")
+        ).encode("utf-8")
+        return self._payloads.setdefault(row, LabPayload(body))
+
+    def stats(self) -> Dict[str, Any]:
+        payloads = list(self._payloads.values())
+        return {
+            "cached": len(payloads),
+            "bytes": sum(len(p.body) + len(p._gzip_body or b'') for p in payloads),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Whether an Accept-Encoding header allows gzip (q=0 means refused)"""
+    for name, q in _codings(accept_encoding):
+        if name in ("gzip", "x-gzip", "*"):
+            return q > 0
+    return False
+
+
+def _codings(accept_encoding: Optional[str]) -> List[Tuple[str, float]]:
+    codings = []
+    for item in (accept_encoding or "").split(','):
+        name, _, params = item.strip().partition(';')
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings.append((name.strip().lower(), q))
+    # 명시된 gzip이 와일드카드보다 우선
+    codings.sort(key=lambda c: c[0] == "*")
+    return codings
@@ -0,0 +1,265 @@
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from lexical_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+# 필드 비트와 정렬 가중치 (이름 > 키워드 > 소개글)
+FIELD_NAME, FIELD_KEYWORDS, FIELD_INTRODUCTION = 1, 2, 4
+SNIPPET_CHARS = 240
+SEARCH_INDEX_FORMAT_VERSION = 1
+
+
+class LabSearchIndex:
+    """Prefix-searchable token index over lab names, keywords and introductions.
+
+    Terms are kept sorted, so all terms starting with a typed prefix form one
+    contiguous range whose postings are also contiguous. Each posting carries
+    a bitmask of the fields the term appeared in. Universities and majors are
+    stored as integer codes so facet counts are a ``bincount`` over the hits,
+    and each facet value's rows are kept as one contiguous partition so
+    recommendation filters can enumerate eligible labs without a full scan.
+    """
+
+    def __init__(
+        self,
+        terms: np.ndarray,
+        offsets: np.ndarray,
+        docs: np.ndarray,
+        fields: np.ndarray,
+        university_codes: np.ndarray,
+        major_codes: np.ndarray,
+        universities: List[str],
+        majors: List[str]
+    ):
+        self.terms = terms
+        self.offsets = offsets
+        self.docs = docs
+        self.fields = fields
+        self.university_codes = university_codes
+        self.major_codes = major_codes
+        self.universities = universities
+        self.majors = majors
+        self._university_ids = {value: i for i, value in enumerate(universities)}
+        self._major_ids = {value: i for i, value in enumerate(majors)}
+        self._university_partition = _partition(university_codes, len(universities))
+        self._major_partition = _partition(major_codes, len(majors))
+
+    def __len__(self) -> int:
+        return int(self.university_codes.shape[0])
+
+    @classmethod
+    def build(cls, labs: Sequence[Any]) -> "LabSearchIndex":
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        universities: Dict[str, int] = {}
+        majors: Dict[str, int] = {}
+        university_codes = np.empty(len(labs), dtype=np.int32)
+        major_codes = np.empty(len(labs), dtype=np.int32)
+
+        for row, lab in enumerate(labs):
+            masks: Dict[str, int] = {}
+            for bit, text in ((FIELD_NAME, lab.name), (FIELD_KEYWORDS, lab.keywords),
+                              (FIELD_INTRODUCTION, lab.introduction)):
+                for term in tokenize(text):
+                    masks[term] = masks.get(term, 0) | bit
+            for term, mask in masks.items():
+                postings.setdefault(term, []).append((row, mask))
+            # 패싯 값은 카탈로그에 처음 등장한 순서를 유지
+            university_codes[row] = universities.setdefault(lab.university, len(universities))
+            major_codes[row] = majors.setdefault(lab.major, len(majors))
+
+        sorted_terms = sorted(postings)
+        counts = [len(postings[term]) for term in sorted_terms]
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        flat = [posting for term in sorted_terms for posting in postings[term]]
+        docs = np.fromiter((row for row, _ in flat), dtype=np.int32, count=len(flat))
+        fields = np.fromiter((mask for _, mask in flat), dtype=np.uint8, count=len(flat))
+        return cls(
+            np.array(sorted_terms, dtype=str), offsets, docs, fields,
+            university_codes, major_codes, list(universities), list(majors)
+        )
+
+    @classmethod
+    def load(cls, path) -> Optional["LabSearchIndex"]:
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            data = np.load(path)
+            if int(data["format_version"]) != SEARCH_INDEX_FORMAT_VERSION:
+                return None
+            return cls(
+                data["terms"], data["offsets"], data["docs"], data["fields"],
+                data["university_codes"], data["major_codes"],
+                data["universities"].tolist(), data["majors"].tolist()
+            )
+        except Exception as e:
+            logger.warning(f"Could not load search index from {path}: {str(e)}")
+            return None
+
+    def save(self, path) -> None:
+        path = Path(path)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                format_version=np.array(SEARCH_INDEX_FORMAT_VERSION),
+                terms=self.terms, offsets=self.offsets, docs=self.docs, fields=self.fields,
+                university_codes=self.university_codes, major_codes=self.major_codes,
+                universities=np.array(self.universities, dtype=str), majors=np.array(self.majors, dtype=str)
+            )
+        os.replace(tmp_path, path)
+        logger.info(f"Saved search index to {path} ({len(self.terms)} terms)")
+
+    def _match_prefix(self, prefix: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows containing a term that starts with ``prefix`` and their field weight"""
+        lo = np.searchsorted(self.terms, prefix, side='left')
+        hi = np.searchsorted(self.terms, prefix + '\U0010ffff', side='left')
+        start, end = self.offsets[lo], self.offsets[hi]
+        if start == end:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+        rows, inverse = np.unique(self.docs[start:end], return_inverse=True)
+        masks = np.zeros(len(rows), dtype=np.uint8)
+        np.bitwise_or.at(masks, inverse, self.fields[start:end])
+        weights = np.where(masks & FIELD_NAME, 3, np.where(masks & FIELD_KEYWORDS, 2, 1)).astype(np.int32)
+        return rows, weights
+
+    def search(
+        self,
+        query: str = "",
+        university: str = "",
+        major: str = "",
+        page: int = 1,
+        page_size: int = 20
+    ) -> Dict[str, Any]:
+        """Rows on the requested page plus total hits and university/major facet counts
+
+        Every query term must prefix-match some term of the lab. Facets are
+        disjunctive: university counts ignore the university filter and
+        major counts ignore the major filter.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if tokens:
+            rows, scores = None, None
+            for token in tokens:
+                matched, weights = self._match_prefix(token)
+                if rows is None:
+                    rows, scores = matched, weights
+                else:
+                    rows, left, right = np.intersect1d(rows, matched, assume_unique=True, return_indices=True)
+                    scores = scores[left] + weights[right]
+                if not len(rows):
+                    break
+        else:
+            rows = np.arange(len(self), dtype=np.int32)
+            scores = np.zeros(len(self), dtype=np.int32)
+
+        university_mask = self._facet_mask(self.university_codes[rows], self._university_ids, university)
+        major_mask = self._facet_mask(self.major_codes[rows], self._major_ids, major)
+        university_counts = np.bincount(self.university_codes[rows[major_mask]], minlength=len(self.universities))
+        major_counts = np.bincount(self.major_codes[rows[university_mask]], minlength=len(self.majors))
+
+        keep = university_mask & major_mask
+        rows, scores = rows[keep], scores[keep]
+        if tokens:
+            order = np.argsort(-scores, kind='stable')
+            rows = rows[order]
+        start = (page - 1) * page_size
+        return {
+            "total": int(len(rows)),
+            "rows": rows[start:start + page_size].tolist(),
+            "tokens": tokens,
+            "facets": {
+                "universities": _facet_list(self.universities, university_counts),
+                "majors": _facet_list(self.majors, major_counts),
+            },
+        }
+
+    def eligible_rows(self, universities: Sequence[str] = (), majors: Sequence[str] = ()) -> Optional[np.ndarray]:
+        """Sorted rows in any of ``universities`` and any of ``majors``; None when unfiltered
+
+        Rows come straight from the per-value partitions, so the cost is
+        proportional to the size of the selected partitions.
+        """
+        rows = None
+        for values, ids, (order, offsets) in (
+            (universities, self._university_ids, self._university_partition),
+            (majors, self._major_ids, self._major_partition),
+        ):
+            if not values:
+                continue
+            parts = [order[offsets[code]:offsets[code + 1]] for code in (ids.get(v) for v in values) if code is not None]
+            if not parts:
+                return np.empty(0, dtype=np.int64)
+            selected = parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts))
+            rows = selected if rows is None else np.intersect1d(rows, selected, assume_unique=True)
+        return rows
+
+    @staticmethod
+    def _facet_mask(codes: np.ndarray, ids: Dict[str, int], value: str) -> np.ndarray:
+        if not value:
+            return np.ones(len(codes), dtype=bool)
+        code = ids.get(value)
+        if code is None:
+            return np.zeros(len(codes), dtype=bool)
+        return codes == code
+
+
+def prepare_search_index(labs: Sequence[Any], index_dir, version: str) -> LabSearchIndex:
+    """Load the persisted search index for ``version`` or build and persist it"""
+    path = Path(index_dir) / f"search-{version}.npz"
+    index = LabSearchIndex.load(path)
+    if index is not None and len(index) == len(labs):
+        return index
+    index = LabSearchIndex.build(labs)
+    try:
+        index.save(path)
+    except OSError as e:
+        logger.warning(f"Could not persist search index: {str(e)}")
+    return index
+
+
+def _partition(codes: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Rows grouped by facet code (ascending within each group) plus CSR offsets"""
+    order = np.argsort(codes, kind='stable').astype(np.int64)
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=size))]).astype(np.int64)
+    return order, offsets
+
+
+def _facet_list(values: List[str], counts: np.ndarray) -> List[Dict[str, Any]]:
+    return [
+        {"value": value, "count": int(count)}
+        for value, count in zip(values, counts.tolist()) if count
+    ]
+
+
+def make_snippet(text: str, tokens: List[str], width: int = SNIPPET_CHARS) -> Dict[str, Any]:
+    """Short excerpt around the first query match, with [start, end) offsets of matched words"""
+    text = ' '.join((text or "").split())
+    pattern = None
+    if tokens:
+        pattern = re.compile(r'\b(?:' + '|'.join(re.escape(t) for t in sorted(tokens, key=len, reverse=True)) + r')\w*',
+                             re.IGNORECASE)
+    first = pattern.search(text) if pattern is not None else None
+
+    start = 0
+    if first is not None and first.start() > width // 3:
+        start = text.rfind(' ', 0, first.start() - width // 3) + 1
+    end = min(len(text), start + width)
+    if end < len(text):
+        cut = text.rfind(' ', start, end)
+        end = cut if cut > start else end
+
+    snippet = text[start:end]
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(text) else ""
+    highlights = []
+    if pattern is not None:
+        highlights = [[m.start() + len(prefix), m.end() + len(prefix)] for m in pattern.finditer(snippet)]
+    return {"snippet": prefix + snippet + suffix, "highlights": highlights}
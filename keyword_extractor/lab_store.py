@@ -0,0 +1,248 @@
+import argparse
+import json
+import logging
+import re
+import time
+import tracemalloc
+from collections.abc import Sequence
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from catalog_snapshot import FIELDS, CatalogSnapshot
+
+logger = logging.getLogger(__name__)
+
+# 응답용 연구실 필드 (카탈로그 필드 + 중복 없는 슬러그)
+RECORD_FIELDS = FIELDS + ("slug",)
+
+
+# Lab 타입 정의 (page.tsx와 일치)
+class Lab:
+    __slots__ = FIELDS
+
+    def __init__(self, id: str, name: str, major: str, university: str, keywords: str, introduction: str):
+        self.id = id
+        self.name = name
+        self.major = major
+        self.university = university
+        self.keywords = keywords
+        self.introduction = introduction
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "major": self.major,
+            "university": self.university,
+            "keywords": self.keywords,
+            "introduction": self.introduction
+        }
+
+
+def slugify(text: str):
+    if not text:
+        return ""
+    text = text.lower()
+    text = re.sub(r'\s+', '-', text)
+    text = re.sub(r'[^\w\-]', '', text)
+    return text
+
+
+def unique_slugs(names: Iterable[str], ids: Iterable[str]) -> List[str]:
+    """One distinct slug per lab, in catalog order.
+
+    The last lab with a given name slug keeps the plain slug, as in the
+    original ``{slugify(lab.name): lab}`` lookup where later labs
+    overwrote earlier ones, so existing ``/lab-by-slug`` URLs keep
+    resolving to the same lab. Earlier labs with that name get
+    ``slug-2``, ``slug-3``, ... (skipping any slug another lab already has).
+    """
+    bases = [slugify(name) or slugify(lab_id) for name, lab_id in zip(names, ids)]
+    owner = {base: row for row, base in enumerate(bases)}
+    taken = set(bases)
+    counters: Dict[str, int] = {}
+    slugs: List[str] = []
+    for row, base in enumerate(bases):
+        if owner[base] == row:
+            slugs.append(base)
+            continue
+        n = counters.get(base, 1)
+        slug = base
+        while slug in taken:
+            n += 1
+            slug = f"{base}-{n}"
+        counters[base] = n
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+class LabStore(Sequence):
+    """Column-backed lab catalog with O(1) id and slug lookups.
+
+    Text lives in a ``CatalogSnapshot`` (memory-mapped from the index dir,
+    or in-process bytes when that is not writable), with introductions
+    compressed per lab. The store itself only keeps the id and slug
+    columns and their row indexes; ``Lab`` objects and dicts are decoded
+    per request, and only the fields that are asked for.
+    """
+
+    __slots__ = ("snapshot", "ids", "slugs", "_rows_by_id", "_rows_by_slug")
+
+    def __init__(self, snapshot: CatalogSnapshot):
+        self.snapshot = snapshot
+        self.ids = snapshot.column("id")
+        self.slugs = unique_slugs(snapshot.column("name"), self.ids)
+        # 중복 id는 처음 나온 연구실로 조회 (기존 get_lab_by_id의 선형 탐색과 같은 결과)
+        self._rows_by_id: Dict[str, int] = {}
+        for row, lab_id in enumerate(self.ids):
+            self._rows_by_id.setdefault(lab_id, row)
+        self._rows_by_slug = {slug: row for row, slug in enumerate(self.slugs)}
+        if len(self._rows_by_id) != len(self.ids):
+            logger.warning(f"Catalog has {len(self.ids) - len(self._rows_by_id)} duplicate lab ids; "
+                           "lookups return the first one")
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, str]], hashes: List[str]) -> "LabStore":
+        return cls(CatalogSnapshot.from_records(records, hashes))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        return Lab(**self.snapshot.record(int(row)))
+
+    def get(self, field: str, row: int) -> str:
+        return self.snapshot.get(field, int(row))
+
+    def column(self, field: str) -> List[str]:
+        if field == "id":
+            return list(self.ids)
+        return self.snapshot.column(field)
+
+    def record(self, row: int, fields: Iterable[str] = RECORD_FIELDS) -> Dict[str, Any]:
+        """Lab dict (catalog fields plus the unique ``slug``) decoding only the requested fields"""
+        row = int(row)
+        return {
+            field: self.slugs[row] if field == "slug" else self.snapshot.get(field, row)
+            for field in fields
+        }
+
+    def row_of(self, lab_id: str) -> Optional[int]:
+        return self._rows_by_id.get(lab_id)
+
+    def row_for_slug(self, slug: str) -> Optional[int]:
+        return self._rows_by_slug.get(slug)
+
+    def lab_hashes(self) -> List[str]:
+        return self.snapshot.lab_hashes()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "labs": len(self),
+            "text_bytes": self.snapshot.nbytes(),
+            "mmap": self.snapshot.mapped,
+        }
+
+
+def synthetic_records(count: int, seed: int = 0) -> List[Dict[str, str]]:
+    """Catalog-shaped records with Zipf-distributed vocabulary and ~500-word introductions"""
+    rng = np.random.default_rng(seed)
+    vocabulary = [f"term{i}" for i in range(5000)]
+    weights = 1.0 / np.arange(1, len(vocabulary) + 1)
+    weights /= weights.sum()
+    universities = [f"University {i}" for i in range(200)]
+    majors = [f"Major {i}" for i in range(60)]
+
+    def words(n: int) -> str:
+        return ' '.join(vocabulary[i] for i in rng.choice(len(vocabulary), n, p=weights))
+
+    records = []
+    for row in range(count):
+        university = universities[int(rng.integers(len(universities)))]
+        records.append({
+            "id": f"lab-{row}",
+            # 이름은 일부러 겹치게 만들어 슬러그 충돌 처리까지 측정
+            "name": f"{' '.join(rng.choice(vocabulary, 2)).title()} Lab",
+            "major": majors[int(rng.integers(len(majors)))],
+            "university": university,
+            "keywords": ', '.join(words(2) for _ in range(6)),
+            "introduction": words(int(rng.integers(300, 700))),
+        })
+    return records
+
+
+def benchmark(count: int = 100_000, lookups: int = 2000, seed: int = 0) -> Dict[str, Any]:
+    """Memory per lab and lookup latency: LabStore vs. a list of dict-backed lab objects"""
+    from lab_index import lab_content_hash
+
+    records = synthetic_records(count, seed)
+    hashes = [lab_content_hash(SimpleNamespace(**record)) for record in records]
+    rng = np.random.default_rng(seed + 1)
+    probe = [records[int(row)] for row in rng.integers(count, size=lookups)]
+
+    def measure(build):
+        tracemalloc.start()
+        value = build()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return value, current
+
+    # 기존 방식: 모든 필드를 __dict__에 들고 있는 객체 리스트 + 선형 탐색
+    # (JSON에서 다시 읽어 문자열까지 새로 할당되도록 함)
+    payload = json.dumps(records)
+    objects, object_bytes = measure(lambda: [SimpleNamespace(**record) for record in json.loads(payload)])
+    del payload
+    scan_lookups = probe[:max(1, lookups // 20)]
+    started = time.perf_counter()
+    for record in scan_lookups:
+        next(lab for lab in objects if lab.id == record["id"]).__dict__.copy()
+    scan_us = (time.perf_counter() - started) * 1e6 / len(scan_lookups)
+    del objects
+
+    store, store_bytes = measure(lambda: LabStore.from_records(records, hashes))
+    started = time.perf_counter()
+    LabStore(store.snapshot)
+    open_s = time.perf_counter() - started
+    started = time.perf_counter()
+    for record in probe:
+        store.record(store.row_of(record["id"]))
+    id_us = (time.perf_counter() - started) * 1e6 / len(probe)
+    started = time.perf_counter()
+    for record in probe:
+        store.row_for_slug(slugify(record["name"]))
+    slug_us = (time.perf_counter() - started) * 1e6 / len(probe)
+    started = time.perf_counter()
+    for record in probe:
+        store.record(store.row_of(record["id"]), ("id", "name", "major", "university", "keywords", "slug"))
+    no_intro_us = (time.perf_counter() - started) * 1e6 / len(probe)
+
+    return {
+        "labs": count,
+        "slug_collisions": sum(1 for slug, record in zip(store.slugs, records) if slug != slugify(record["name"])),
+        "objects_bytes_per_lab": round(object_bytes / count),
+        "store_bytes_per_lab": round(store_bytes / count),
+        "store_text_bytes_per_lab": round(store.snapshot.nbytes() / count),
+        "store_open_s": round(open_s, 2),
+        "scan_lookup_us": round(scan_us, 1),
+        "id_lookup_us": round(id_us, 2),
+        "slug_lookup_us": round(slug_us, 2),
+        "id_lookup_without_introduction_us": round(no_intro_us, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the compact lab store on a synthetic catalog")
+    parser.add_argument("--labs", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.labs, args.lookups), indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
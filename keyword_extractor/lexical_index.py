@@ -0,0 +1,167 @@
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ann_index import select_top_k
+
+logger = logging.getLogger(__name__)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# 키워드 필드의 단어는 소개글 단어보다 이만큼 더 세게 반영 (BM25F 방식의 필드 가중치)
+KEYWORD_FIELD_WEIGHT = 2.0
+LEXICAL_RECIPE = f"bm25f/keywords*{KEYWORD_FIELD_WEIGHT:g}+introduction/k1-{BM25_K1:g}-b-{BM25_B:g}/v1"
+
+# C++, C#, CRISPR-Cas 같은 기술 용어를 한 토큰으로 유지
+TOKEN_PATTERN = re.compile(r"\w+(?:[-+#]\w+)*[+#]*")
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "into", "is", "it",
+    "its", "of", "on", "or", "our", "that", "the", "their", "this", "to", "we", "with",
+})
+
+
+def tokenize(text: str) -> Iterator[str]:
+    """Lower-cased terms; hyphenated compounds also yield their parts"""
+    for match in TOKEN_PATTERN.finditer((text or "").lower()):
+        token = match.group(0)
+        if token in STOPWORDS:
+            continue
+        yield token
+        if '-' in token:
+            for part in token.split('-'):
+                if part and part not in STOPWORDS:
+                    yield part
+
+
+class BM25Index:
+    """Inverted index over lab keywords and introductions with precomputed BM25 impacts.
+
+    Postings are stored CSR-style: the labs containing term ``t`` are
+    ``docs[offsets[t]:offsets[t + 1]]`` with their BM25 contribution in
+    ``impacts``, so a query only touches the postings of its own terms.
+    """
+
+    def __init__(self, terms: np.ndarray, offsets: np.ndarray, docs: np.ndarray, impacts: np.ndarray, count: int):
+        self.terms = terms
+        self.offsets = offsets
+        self.docs = docs
+        self.impacts = impacts
+        self.count = count
+        self.vocab = {term: i for i, term in enumerate(terms.tolist())}
+
+    def __len__(self) -> int:
+        return self.count
+
+    @classmethod
+    def build(cls, labs: Sequence[Any]) -> "BM25Index":
+        vocab: Dict[str, int] = {}
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        freqs: List[float] = []
+        lengths = np.zeros(len(labs), dtype=np.float32)
+
+        for row, lab in enumerate(labs):
+            tf: Dict[str, float] = {}
+            for term in tokenize(lab.keywords):
+                tf[term] = tf.get(term, 0.0) + KEYWORD_FIELD_WEIGHT
+            for term in tokenize(lab.introduction):
+                tf[term] = tf.get(term, 0.0) + 1.0
+            lengths[row] = sum(tf.values())
+            for term, freq in tf.items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                doc_ids.append(row)
+                freqs.append(freq)
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        docs = np.asarray(doc_ids, dtype=np.int32)
+        tf = np.asarray(freqs, dtype=np.float32)
+        order = np.argsort(term_ids, kind='stable')
+        term_ids, docs, tf = term_ids[order], docs[order], tf[order]
+
+        df = np.bincount(term_ids, minlength=len(vocab)).astype(np.float32)
+        offsets = np.concatenate([[0], np.cumsum(df)]).astype(np.int64)
+        n = max(1, len(labs))
+        idf = np.log1p((n - df + 0.5) / (df + 0.5))
+        avg_length = float(lengths.mean()) if len(labs) and lengths.mean() > 0 else 1.0
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[docs] / avg_length)
+        impacts = (idf[term_ids] * tf * (BM25_K1 + 1) / (tf + norm)).astype(np.float32)
+
+        terms = np.empty(len(vocab), dtype=object)
+        for term, i in vocab.items():
+            terms[i] = term
+        return cls(terms.astype(str), offsets, docs, impacts, len(labs))
+
+    def match(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """All labs matching any query term, as (sorted rows, BM25 scores)"""
+        slices = [
+            (self.offsets[t], self.offsets[t + 1])
+            for t in {self.vocab[term] for term in tokenize(text) if term in self.vocab}
+        ]
+        if not slices:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        docs = np.concatenate([self.docs[start:end] for start, end in slices])
+        impacts = np.concatenate([self.impacts[start:end] for start, end in slices])
+        rows, inverse = np.unique(docs, return_inverse=True)
+        return rows.astype(np.int64), np.bincount(inverse, weights=impacts).astype(np.float32)
+
+    def search(self, text: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        rows, scores = self.match(text)
+        top = select_top_k(scores, min(k, len(rows)))
+        return rows[top], scores[top]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"terms": len(self.terms), "postings": int(len(self.docs))}
+
+    @classmethod
+    def load(cls, path) -> Optional["BM25Index"]:
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            data = np.load(path)
+            if str(data["recipe"]) != LEXICAL_RECIPE:
+                return None
+            return cls(data["terms"], data["offsets"], data["docs"], data["impacts"], int(data["count"]))
+        except Exception as e:
+            logger.warning(f"Could not load lexical index from {path}: {str(e)}")
+            return None
+
+    def save(self, path) -> None:
+        path = Path(path)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, recipe=np.array(LEXICAL_RECIPE), terms=self.terms, offsets=self.offsets,
+                     docs=self.docs, impacts=self.impacts, count=np.array(self.count))
+        os.replace(tmp_path, path)
+        logger.info(f"Saved lexical index to {path} ({len(self.terms)} terms)")
+
+
+def reciprocal_rank_fusion(rankings: List[np.ndarray], size: int, k: int = 60) -> np.ndarray:
+    """RRF score per candidate position from per-retriever orderings of candidate positions"""
+    fused = np.zeros(size, dtype=np.float32)
+    for order in rankings:
+        fused[order] += 1.0 / (k + 1 + np.arange(len(order), dtype=np.float32))
+    return fused
+
+
+def lexical_index_path(index_dir, version: str) -> Path:
+    return Path(index_dir) / f"bm25-{version}.npz"
+
+
+def prepare_lexical_index(labs: Sequence[Any], index_dir, version: str) -> BM25Index:
+    """Load the persisted lexical index for ``version`` or build and persist it"""
+    path = lexical_index_path(index_dir, version)
+    index = BM25Index.load(path)
+    if index is not None and len(index) == len(labs):
+        logger.info(f"Loaded lexical index from {path}")
+        return index
+    index = BM25Index.build(labs)
+    try:
+        index.save(path)
+    except OSError as e:
+        logger.warning(f"Could not persist lexical index: {str(e)}")
+    return index
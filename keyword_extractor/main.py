@@ -1,23 +1,24 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import os
-import tempfile
-from pathlib import Path
+import asyncio
+import hmac
 from extractor import KeywordExtractor
-from lab_matcher import LabMatcher
+from lab_matcher import LabMatcher, StaleCursorError, recommendation_fields
+from cache import normalize_filter
+from lab_payloads import LabPayload, accepts_gzip
+from diversify import diversity_policy
+from batcher import MicroBatcher
+from executors import WorkPools, PoolSaturatedError
+from gemini_client import GeminiTimeoutError
+from cv_cache import ExtractionCache
+from pdf_workers import PdfWorkerPool, PdfParseError
+from uploads import InvalidUpload, UploadTooLarge, read_file_upload
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 import uvicorn
-import re
-
-def slugify(text: str):
-    if not text:
-        return ""
-    text = text.lower()
-    text = re.sub(r'\s+', '-', text)
-    text = re.sub(r'[^\w\-]', '', text)
-    return text
+import json
 
 app = FastAPI(title="CV Keyword Extractor", version="1.0.0")
 
@@ -35,71 +36,209 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 업로드 폴더 생성
-UPLOAD_DIR = Path("uploaded_files")
-UPLOAD_DIR.mkdir(exist_ok=True)
+# 업로드 크기 제한 (10MB)
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+
+# 블로킹 작업(PDF 파싱, 임베딩)용 작업 풀
+work_pools = WorkPools()
+
+# PDF 파싱 격리 프로세스 (pdf 작업 풀의 스레드 하나가 워커 하나를 사용)
+pdf_workers = PdfWorkerPool(size=work_pools["pdf"].max_workers)
 
 # 키워드 추출기 및 연구실 매칭기 초기화
-extractor = KeywordExtractor()
+extractor = KeywordExtractor(pools=work_pools, pdf_workers=pdf_workers)
+# CV 키워드 추출 결과 캐시 (PDF 내용 해시 + 프롬프트/모델 버전 기준)
+cv_cache = ExtractionCache()
 lab_matcher = LabMatcher()
-# 슬러그 기반 조회를 위한 딕셔너리 생성
-lab_matcher.labs_by_slug = {slugify(lab.name): lab for lab in lab_matcher.labs_data}
+# 카탈로그 파일 변경 감시 주기 (초, 0이면 비활성화)
+lab_matcher.start_watching(float(os.getenv("LAB_CATALOG_WATCH_S", "0")))
+# 관리자 API 토큰 (설정되지 않으면 관리자 API 자체를 비활성화)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# 자주 쓰이는 질의로 추천 캐시 예열 (선택 사항)
+CACHE_WARMUP_FILE = os.getenv("LAB_CACHE_WARMUP_FILE")
+if CACHE_WARMUP_FILE and os.path.exists(CACHE_WARMUP_FILE):
+    with open(CACHE_WARMUP_FILE, encoding='utf-8') as f:
+        lab_matcher.warm_up(json.load(f))
+
+# 동시에 들어온 추천 요청을 모아서 한 번에 인코딩/스코어링
+recommend_batcher = MicroBatcher(
+    lab_matcher.rank_batch,
+    max_wait_ms=float(os.getenv("LAB_BATCH_WINDOW_MS", "5")),
+    max_batch_size=int(os.getenv("LAB_BATCH_MAX_SIZE", "64")),
+    executor=work_pools["embedding"],
+    name="recommend_batcher"
+)
+
+@app.on_event("startup")
+async def start_batcher():
+    await recommend_batcher.start()
+    await work_pools.run("pdf", pdf_workers.start)
+    await cv_cache.load_index()
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    await recommend_batcher.stop()
+    work_pools.shutdown()
+    pdf_workers.shutdown()
 
 # 요청 모델 정의
 class KeywordSearchRequest(BaseModel):
     keywords: List[str]
+    user_major: str = ""
     top_n: int = 10
+    # 비어 있으면 제한 없음; 값은 카탈로그의 대학/학과 이름과 정확히 일치해야 함
+    universities: List[str] = []
+    majors: List[str] = []
+    # 응답 필드: view는 full(기본) 또는 compact(소개글 대신 짧은 스니펫), fields를 주면 그 필드만 반환
+    view: str = "full"
+    fields: Optional[List[str]] = None
+    # 페이지 조회: page_size를 주면 top_n 대신 커서(next_cursor)로 다음 페이지를 요청
+    page_size: Optional[int] = None
+    cursor: Optional[str] = None
+    # 다양성 재정렬: 대학/학과별 최대 개수(0이면 제한 없음), MMR 람다(1이면 관련도만); 비우면 서버 기본값
+    max_per_university: Optional[int] = None
+    max_per_major: Optional[int] = None
+    mmr_lambda: Optional[float] = None
+
+    def diversity(self):
+        return diversity_policy(self.max_per_university, self.max_per_major, self.mmr_lambda)
+
+class BatchKeywordSearchRequest(BaseModel):
+    requests: List[KeywordSearchRequest]
+
+# 배치 요청당 최대 질의 수
+MAX_BATCH_QUERIES = 512
+# 연구실 검색 페이지당 최대 결과 수
+MAX_SEARCH_PAGE_SIZE = 100
+# 페이지 조회 시 한 번에 순위를 매겨 캐시해 두는 결과 수와 페이지 크기 제한
+RECOMMEND_PAGE_DEPTH = int(os.getenv("LAB_RECOMMEND_DEPTH", "200"))
+MAX_RECOMMEND_PAGE_SIZE = 100
+
+class ClientDisconnected(Exception):
+    """클라이언트 연결이 끊겨 작업을 취소함"""
+
+async def cancel_on_disconnect(request: Request, coro, poll_interval: float = 0.5):
+    """클라이언트 연결이 끊기면 진행 중인 작업(LLM 호출 등)을 취소"""
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+
+def process_memory():
+    """현재 워커 프로세스의 메모리 사용량 (MB, 리눅스 /proc 기준)
+
+    RssFile은 mmap된 인덱스/카탈로그처럼 다른 워커와 공유되는 페이지,
+    RssAnon은 이 워커만 쓰는 메모리(모델 가중치, 파이썬 객체 등)에 해당한다.
+    """
+    memory = {"pid": os.getpid()}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "RssAnon", "RssFile", "RssShmem"):
+                    memory[key] = round(int(value.split()[0]) / 1024, 1)
+    except OSError:
+        pass
+    return memory
 
 @app.get("/")
 async def root():
     return {"message": "CV Keyword Extractor API", "status": "running"}
 
-@app.post("/extract-keywords")
-async def extract_keywords(file: UploadFile = File(...)):
+# UploadFile 대신 본문을 직접 스트리밍으로 파싱하므로 문서용 요청 스키마를 따로 명시
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"]
+                }
+            }
+        }
+    }
+}
+
+@app.post("/extract-keywords", openapi_extra=UPLOAD_REQUEST_BODY)
+async def extract_keywords(request: Request):
     try:
-        # PDF 파일만 허용
-        if not file.filename.lower().endswith('.pdf'):
+        # 파일 크기 제한 (10MB): 폼 파싱 전에 헤더로 거르고, 받는 도중에도 검사 (디스크에 쓰지 않음)
+        try:
+            filename, file_content, content_sha256 = await read_file_upload(
+                request, "file", MAX_UPLOAD_BYTES
+            )
+        except UploadTooLarge:
             raise HTTPException(
-                status_code=400, 
-                detail="PDF 파일만 업로드 가능합니다."
+                status_code=413,
+                detail="파일 크기는 10MB 이하여야 합니다."
             )
-        
-        # 파일 크기 제한 (10MB)
-        file_content = await file.read()
-        if len(file_content) > 10 * 1024 * 1024:
+        except InvalidUpload as e:
             raise HTTPException(
                 status_code=400,
-                detail="파일 크기는 10MB 이하여야 합니다."
+                detail=str(e)
+            )
+
+        # PDF 파일만 허용
+        if not filename.lower().endswith('.pdf'):
+            raise HTTPException(
+                status_code=400, 
+                detail="PDF 파일만 업로드 가능합니다."
             )
-        
-        # 임시 파일로 저장
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-            temp_file.write(file_content)
-            temp_file_path = temp_file.name
         
         try:
-            # 키워드 추출 실행
-            result = await extractor.extract_keywords(temp_file_path)
+            # 키워드 추출 실행 (같은 PDF는 캐시/진행 중인 추출을 공유, 임시 파일 없이 메모리에서 파싱)
+            cache_key = cv_cache.make_key(content_sha256, extractor.cache_version)
+            result = await cancel_on_disconnect(
+                request,
+                cv_cache.get_or_compute(cache_key, lambda: extractor.extract_keywords(file_content))
+            )
             
             return JSONResponse(content={
                 "success": True,
-                "filename": file.filename,
+                "filename": filename,
                 "extraction_method": result["method"],
                 "keywords": result["keywords"],
                 "categories": result.get("categories", {}),
                 "confidence": result.get("confidence", "unknown")
             })
             
+        except PoolSaturatedError:
+            raise HTTPException(
+                status_code=503,
+                detail="요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요."
+            )
+        except PdfParseError as e:
+            raise HTTPException(
+                status_code=422,
+                detail=str(e)
+            )
+        except GeminiTimeoutError as e:
+            raise HTTPException(
+                status_code=504,
+                detail=f"키워드 추출 시간이 초과되었습니다: {str(e)}"
+            )
+        except ClientDisconnected:
+            print(f"⚠️ 클라이언트 연결 종료로 추출 취소: {filename}")
+            raise HTTPException(
+                status_code=499,
+                detail="클라이언트 연결이 종료되었습니다."
+            )
         except Exception as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"키워드 추출 중 오류가 발생했습니다: {str(e)}"
             )
-        
-        finally:
-            # 임시 파일 삭제
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
     
     except HTTPException:
         raise
@@ -109,30 +248,90 @@ async def extract_keywords(file: UploadFile = File(...)):
             detail=f"파일 처리 중 오류가 발생했습니다: {str(e)}"
         )
 
+def response_fields(request: KeywordSearchRequest):
+    """요청의 view/fields로 응답에 담을 필드 결정 (알 수 없는 값이면 400)"""
+    try:
+        return recommendation_fields(request.view, request.fields)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"잘못된 응답 필드 요청입니다: {str(e)}"
+        )
+
 @app.post("/recommend-labs")
 async def recommend_labs(request: KeywordSearchRequest):
-    """키워드 기반 연구실 추천"""
+    """키워드 기반 연구실 추천 (필드 선택, 커서 기반 페이지 조회 지원)"""
     try:
         if not request.keywords:
             raise HTTPException(
                 status_code=400,
                 detail="키워드를 입력해주세요."
             )
+        fields = response_fields(request)
+        paged = request.page_size is not None or request.cursor is not None
+        page_size = request.page_size or 10
+        if paged and not 1 <= page_size <= MAX_RECOMMEND_PAGE_SIZE:
+            raise HTTPException(
+                status_code=400,
+                detail=f"page_size는 1~{MAX_RECOMMEND_PAGE_SIZE} 사이여야 합니다."
+            )
         
         print(f"🔍 키워드 검색 요청: {request.keywords}")
         
-        # 연구실 추천
-        recommendations = lab_matcher.get_top_recommendations(
+        # 순위(연구실 행 번호 + 점수)는 질의별로 캐시되므로 다음 페이지는 다시 계산하지 않음
+        depth = RECOMMEND_PAGE_DEPTH if paged else request.top_n
+        ranked = lab_matcher.get_cached_ranking(
             cv_keywords=request.keywords,
-            top_n=request.top_n
+            user_major=request.user_major,
+            top_n=depth,
+            universities=request.universities,
+            majors=request.majors,
+            policy=request.diversity()
         )
+        if ranked is None:
+            try:
+                ranked = await recommend_batcher.submit(
+                    (request.keywords, request.user_major, depth,
+                     normalize_filter(request.universities, request.majors), request.diversity())
+                )
+            except PoolSaturatedError:
+                raise HTTPException(
+                    status_code=503,
+                    detail="요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요."
+                )
         
+        if not paged:
+            recommendations = lab_matcher.render(ranked, fields)
+            return JSONResponse(content={
+                "success": True,
+                "keywords": request.keywords,
+                "total_labs": len(lab_matcher.labs_data),
+                "recommendations": recommendations,
+                "top_n": min(request.top_n, len(recommendations))
+            })
+
+        try:
+            offset = ranked.offset_of(request.cursor) if request.cursor else 0
+        except StaleCursorError:
+            raise HTTPException(
+                status_code=410,
+                detail="연구실 목록이 갱신되었습니다. 처음 페이지부터 다시 요청해주세요."
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=400,
+                detail=f"잘못된 커서입니다: {str(e)}"
+            )
+        recommendations = lab_matcher.render(ranked, fields, offset, page_size)
+        end = offset + len(recommendations)
         return JSONResponse(content={
             "success": True,
             "keywords": request.keywords,
             "total_labs": len(lab_matcher.labs_data),
             "recommendations": recommendations,
-            "top_n": min(request.top_n, len(recommendations))
+            "top_n": len(recommendations),
+            "total_results": len(ranked),
+            "next_cursor": ranked.cursor(end) if end < len(ranked) else None
         })
     
     except HTTPException:
@@ -143,22 +342,117 @@ async def recommend_labs(request: KeywordSearchRequest):
             detail=f"추천 처리 중 오류가 발생했습니다: {str(e)}"
         )
 
+@app.post("/recommend-labs/batch")
+async def recommend_labs_batch(request: BatchKeywordSearchRequest):
+    """여러 키워드 세트에 대한 연구실 추천을 한 번에 처리"""
+    try:
+        if not request.requests:
+            raise HTTPException(
+                status_code=400,
+                detail="요청 목록이 비어 있습니다."
+            )
+        if len(request.requests) > MAX_BATCH_QUERIES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"한 번에 최대 {MAX_BATCH_QUERIES}개의 요청만 처리할 수 있습니다."
+            )
+        for index, item in enumerate(request.requests):
+            if not item.keywords:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"{index}번째 요청에 키워드를 입력해주세요."
+                )
+            if item.page_size is not None or item.cursor is not None:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"{index}번째 요청: 배치 요청은 페이지 조회를 지원하지 않습니다."
+                )
+        fields = [response_fields(item) for item in request.requests]
+
+        print(f"🔍 배치 키워드 검색 요청: {len(request.requests)}건")
+
+        batch_results = await work_pools.run(
+            "embedding",
+            lab_matcher.get_batch_recommendations,
+            [
+                (item.keywords, item.user_major, item.top_n,
+                 normalize_filter(item.universities, item.majors), item.diversity())
+                for item in request.requests
+            ],
+            fields
+        )
+
+        return JSONResponse(content={
+            "success": True,
+            "total_labs": len(lab_matcher.labs_data),
+            "results": [
+                {
+                    "keywords": item.keywords,
+                    "recommendations": recommendations,
+                    "top_n": min(item.top_n, len(recommendations))
+                }
+                for item, recommendations in zip(request.requests, batch_results)
+            ]
+        })
+
+    except HTTPException:
+        raise
+    except PoolSaturatedError:
+        raise HTTPException(
+            status_code=503,
+            detail="요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요."
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"추천 처리 중 오류가 발생했습니다: {str(e)}"
+        )
+
+@app.get("/labs/search")
+async def search_labs(q: str = "", university: str = "", major: str = "", page: int = 1, page_size: int = 20):
+    """연구실 데이터베이스 검색 (접두어 토큰 매칭, 대학/학과 패싯, 페이지네이션)"""
+    if page < 1 or not 1 <= page_size <= MAX_SEARCH_PAGE_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"page는 1 이상, page_size는 1~{MAX_SEARCH_PAGE_SIZE} 사이여야 합니다."
+        )
+    try:
+        result = lab_matcher.search_labs(q, university, major, page, page_size)
+        return JSONResponse(content={"success": True, **result})
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"연구실 검색 중 오류가 발생했습니다: {str(e)}"
+        )
+
+def lab_payload_response(payload: LabPayload, request: Request) -> Response:
+    """미리 직렬화된 연구실 상세 응답 (If-None-Match면 304, 가능하면 gzip)"""
+    use_gzip = payload.compressible and accepts_gzip(request.headers.get("accept-encoding"))
+    headers = {
+        "ETag": payload.gzip_etag if use_gzip else payload.etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding"
+    }
+    if payload.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=payload.gzip_body, media_type="application/json", headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
 @app.get("/lab-by-slug/{slug}")
-async def get_lab_by_slug(slug: str):
+async def get_lab_by_slug(slug: str, request: Request):
     """슬러그 기반으로 연구실 상세 정보 조회"""
     try:
-        lab = lab_matcher.labs_by_slug.get(slug)
+        payload = lab_matcher.get_lab_payload_by_slug(slug)
         
-        if not lab:
+        if payload is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"연구실을 찾을 수 없습니다: {slug}"
             )
         
-        return JSONResponse(content={
-            "success": True,
-            "lab": lab
-        })
+        return lab_payload_response(payload, request)
     
     except HTTPException:
         raise
@@ -169,21 +463,18 @@ async def get_lab_by_slug(slug: str):
         )
 
 @app.get("/lab/{lab_id}")
-async def get_lab_detail(lab_id: str):
+async def get_lab_detail(lab_id: str, request: Request):
     """특정 연구실 상세 정보 조회"""
     try:
-        lab = lab_matcher.get_lab_by_id(lab_id)
+        payload = lab_matcher.get_lab_payload_by_id(lab_id)
         
-        if not lab:
+        if payload is None:
             raise HTTPException(
                 status_code=404,
                 detail="연구실을 찾을 수 없습니다."
             )
         
-        return JSONResponse(content={
-            "success": True,
-            "lab": lab
-        })
+        return lab_payload_response(payload, request)
     
     except HTTPException:
         raise
@@ -193,13 +484,50 @@ async def get_lab_detail(lab_id: str):
             detail=f"연구실 정보 조회 중 오류가 발생했습니다: {str(e)}"
         )
 
+def require_admin(x_admin_token: Optional[str]):
+    """관리자 토큰 검사 (토큰이 설정되지 않은 배포에서는 관리자 API를 404로 숨김)"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="관리자 API가 비활성화되어 있습니다. (ADMIN_TOKEN 미설정)")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8')):
+        raise HTTPException(status_code=403, detail="관리자 토큰이 올바르지 않습니다.")
+
+@app.post("/admin/reload-catalog")
+async def reload_catalog(force: bool = False, x_admin_token: Optional[str] = Header(None)):
+    """카탈로그를 백그라운드에서 다시 불러오고 준비되면 원자적으로 교체"""
+    require_admin(x_admin_token)
+
+    started = lab_matcher.start_reload(force=force)
+    return JSONResponse(status_code=202, content={
+        "success": True,
+        "started": started,
+        "reload": lab_matcher.reload_status()
+    })
+
+@app.get("/admin/reload-catalog")
+async def reload_catalog_status(x_admin_token: Optional[str] = Header(None)):
+    """카탈로그 리로드 진행 상태 조회"""
+    require_admin(x_admin_token)
+    return lab_matcher.reload_status()
+
 @app.get("/health")
 async def health_check():
     return {
         "status": "healthy",
         "gemini_configured": extractor.is_configured(),
         "labs_loaded": len(lab_matcher.labs_data),
-        "matching_ready": lab_matcher.lab_embeddings is not None
+        "matching_ready": lab_matcher.lab_embeddings is not None,
+        "catalog_version": lab_matcher.catalog_version,
+        "vector_index": lab_matcher.vector_index.name if lab_matcher.vector_index else None,
+        "query_encoder": lab_matcher.encoder.describe(),
+        "retrieval": lab_matcher.retrieval_stats(),
+        "catalog_reload": lab_matcher.reload_status(),
+        "memory": {**process_memory(), **lab_matcher.memory_stats()},
+        "caches": lab_matcher.cache_stats(),
+        "recommend_batcher": recommend_batcher.stats(),
+        "work_pools": work_pools.stats(),
+        "gemini": extractor.gemini.stats(),
+        "cv_cache": cv_cache.stats(),
+        "pdf_workers": pdf_workers.stats()
     }
 
 if __name__ == "__main__":
@@ -0,0 +1,233 @@
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ann_index import SearchResult, VectorIndex, select_top_k
+
+logger = logging.getLogger(__name__)
+
+MULTI_VECTOR_FORMAT_VERSION = 1
+# mpnet은 384 토큰에서 자르므로 소개글을 그보다 짧은 단어 창으로 나눔
+CHUNK_WORDS = int(os.getenv("LAB_CHUNK_WORDS", "200"))
+CHUNK_OVERLAP = int(os.getenv("LAB_CHUNK_OVERLAP", "40"))
+# 최종 점수 = w * 키워드 벡터 점수 + (1 - w) * 소개글 청크 최대 점수
+KEYWORD_WEIGHT = float(os.getenv("LAB_KEYWORD_WEIGHT", "0.5"))
+
+
+def chunk_recipe(words: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> str:
+    return f"major+keywords|introduction/words-{words}-overlap-{overlap}/v1"
+
+
+def keyword_text(lab) -> str:
+    return ' '.join(filter(None, [lab.major, lab.keywords]))
+
+
+def chunk_introduction(text: str, words: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    """Split an introduction into overlapping word windows"""
+    tokens = (text or "").split()
+    if not tokens:
+        return []
+    step = max(1, words - overlap)
+    chunks = []
+    for start in range(0, len(tokens), step):
+        chunks.append(' '.join(tokens[start:start + words]))
+        if start + words >= len(tokens):
+            break
+    return chunks
+
+
+class MultiVectorStore:
+    """Per-lab keyword vector plus introduction chunk vectors in CSR layout.
+
+    ``vectors`` holds one keyword vector per lab (rows ``0..n-1``, in lab
+    order) followed by every introduction chunk vector; chunks of lab ``i``
+    are rows ``n + offsets[i] .. n + offsets[i + 1]``. Both arrays are
+    saved as versioned ``.npy`` files next to the bundle and memory-mapped.
+    """
+
+    def __init__(self, manifest: Dict[str, Any], vectors: np.ndarray, offsets: np.ndarray):
+        self.manifest = manifest
+        self.vectors = vectors
+        self.offsets = offsets
+
+    @property
+    def num_labs(self) -> int:
+        return int(self.offsets.shape[0] - 1)
+
+    @property
+    def num_chunks(self) -> int:
+        return int(self.offsets[-1])
+
+    def lab_vectors(self, row: int) -> np.ndarray:
+        """Keyword vector followed by the chunk vectors of one lab"""
+        n = self.num_labs
+        start, end = self.offsets[row], self.offsets[row + 1]
+        return np.concatenate([self.vectors[row:row + 1], self.vectors[n + start:n + end]])
+
+    @classmethod
+    def build(
+        cls,
+        encode: Callable[[List[str]], np.ndarray],
+        labs: Sequence[Any],
+        hashes: List[str],
+        version: str,
+        model_name: str,
+        previous: Optional["MultiVectorStore"] = None
+    ) -> "MultiVectorStore":
+        """Encode every lab's keyword text and introduction chunks, reusing unchanged labs"""
+        recipe = chunk_recipe()
+        reusable: Dict[Any, int] = {}
+        if previous is not None and previous.manifest.get("model_name") == model_name \
+                and previous.manifest.get("recipe") == recipe:
+            reusable = {
+                key: row for row, key in
+                enumerate(zip(previous.manifest["lab_ids"], previous.manifest["lab_hashes"]))
+            }
+
+        # 재사용할 수 없는 연구실의 텍스트만 한 번에 인코딩
+        per_lab: List[Optional[np.ndarray]] = []
+        texts: List[str] = []
+        spans = []
+        for lab, lab_hash in zip(labs, hashes):
+            row = reusable.get((lab.id, lab_hash))
+            if row is not None:
+                per_lab.append(previous.lab_vectors(row))
+                spans.append(None)
+                continue
+            segments = [keyword_text(lab)] + chunk_introduction(lab.introduction)
+            spans.append((len(texts), len(texts) + len(segments)))
+            texts.extend(segments)
+            per_lab.append(None)
+
+        encoded = None
+        if texts:
+            logger.info(f"Encoding {len(texts)} keyword/introduction segments...")
+            encoded = np.asarray(encode(texts), dtype=np.float32)
+        for i, span in enumerate(spans):
+            if span is not None:
+                per_lab[i] = encoded[span[0]:span[1]]
+
+        counts = np.array([len(v) - 1 for v in per_lab], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        if per_lab:
+            vectors = np.concatenate([np.stack([v[0] for v in per_lab])] + [v[1:] for v in per_lab])
+        else:
+            vectors = np.empty((0, 0), dtype=np.float32)
+        manifest = {
+            "format_version": MULTI_VECTOR_FORMAT_VERSION,
+            "version": version,
+            "model_name": model_name,
+            "recipe": recipe,
+            "count": len(per_lab),
+            "chunks": int(offsets[-1]),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "lab_ids": [lab.id for lab in labs],
+            "lab_hashes": list(hashes),
+            "encoded_segments": len(texts),
+        }
+        return cls(manifest, np.ascontiguousarray(vectors, dtype=np.float32), offsets)
+
+    @classmethod
+    def load(cls, index_dir, version: str, model_name: str) -> Optional["MultiVectorStore"]:
+        """Load the store built for ``version``, or None if missing or built differently"""
+        index_dir = Path(index_dir)
+        manifest_path = index_dir / f"mv-{version}.json"
+        if not manifest_path.exists():
+            return None
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+            if manifest.get("format_version") != MULTI_VECTOR_FORMAT_VERSION \
+                    or manifest.get("model_name") != model_name or manifest.get("recipe") != chunk_recipe():
+                return None
+            vectors = np.load(index_dir / f"mv-vectors-{version}.npy", mmap_mode='r')
+            offsets = np.load(index_dir / f"mv-offsets-{version}.npy")
+            return cls(manifest, vectors, offsets)
+        except Exception as e:
+            logger.warning(f"Could not load multi-vector store from {index_dir}: {str(e)}")
+            return None
+
+    def save(self, index_dir) -> None:
+        """Write vectors and offsets, then the manifest (readers check the manifest first)"""
+        index_dir = Path(index_dir)
+        version = self.manifest["version"]
+        for name, array in (("vectors", self.vectors), ("offsets", self.offsets)):
+            path = index_dir / f"mv-{name}-{version}.npy"
+            tmp_path = index_dir / f".{path.name}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp_path, path)
+        tmp_manifest = index_dir / f".mv-{version}.json.tmp"
+        tmp_manifest.write_text(json.dumps(self.manifest, ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp_manifest, index_dir / f"mv-{version}.json")
+        logger.info(f"Saved multi-vector store {version} ({self.num_labs} labs, {self.num_chunks} chunks)")
+
+
+class MultiVectorIndex(VectorIndex):
+    """Exact search with max-sim aggregation over each lab's vectors.
+
+    One matrix multiply scores every keyword and chunk vector; the chunk
+    maximum per lab is a single ``np.maximum.reduceat`` over the CSR
+    segments, so there is no per-lab Python loop.
+    """
+
+    name = "multi_vector"
+    exact = True
+
+    def __init__(self, embeddings: np.ndarray, store: MultiVectorStore, keyword_weight: float = KEYWORD_WEIGHT):
+        super().__init__(embeddings)
+        self.store = store
+        self.keyword_weight = keyword_weight
+        counts = np.diff(store.offsets)
+        self._has_chunks = counts > 0
+        # 청크가 있는 연구실의 구간 시작점 (빈 구간은 제외해야 reduceat 결과가 맞음)
+        self._chunk_starts = store.offsets[:-1][self._has_chunks]
+
+    def score_all(self, queries: np.ndarray) -> np.ndarray:
+        queries = np.atleast_2d(queries).astype(np.float32, copy=False)
+        n = self.store.num_labs
+        sims = queries @ self.store.vectors.T
+        scores = sims[:, :n].copy()
+        if len(self._chunk_starts):
+            chunk_max = np.maximum.reduceat(sims[:, n:], self._chunk_starts, axis=1)
+            w = self.keyword_weight
+            scores[:, self._has_chunks] = w * scores[:, self._has_chunks] + (1.0 - w) * chunk_max
+        return scores
+
+    def score_rows(self, query: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        n = self.store.num_labs
+        rows = np.asarray(rows, dtype=np.int64)
+        scores = np.asarray(self.store.vectors[rows], dtype=np.float32) @ query
+        starts = self.store.offsets[rows]
+        counts = self.store.offsets[rows + 1] - starts
+        has = counts > 0
+        if has.any():
+            # 선택된 연구실들의 청크 행 번호를 이어 붙인 뒤 구간별 최댓값
+            counts, starts = counts[has], starts[has]
+            segments = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            chunk_rows = np.repeat(starts - segments, counts) + np.arange(counts.sum())
+            sims = np.asarray(self.store.vectors[n + chunk_rows], dtype=np.float32) @ query
+            w = self.keyword_weight
+            scores[has] = w * scores[has] + (1.0 - w) * np.maximum.reduceat(sims, segments)
+        return scores
+
+    def search_rows(self, queries: np.ndarray, rows: np.ndarray, k: int) -> List[SearchResult]:
+        k = min(k, len(rows))
+        results = []
+        for query in np.atleast_2d(queries).astype(np.float32, copy=False):
+            scores = self.score_rows(query, rows)
+            top = select_top_k(scores, k)
+            results.append((rows[top], scores[top]))
+        return results
+
+    def search(self, queries: np.ndarray, k: int) -> List[SearchResult]:
+        k = min(k, len(self))
+        results = []
+        for row in self.score_all(queries):
+            top = select_top_k(row, k)
+            results.append((top, row[top]))
+        return results
@@ -0,0 +1,100 @@
+import io
+import os
+import re
+from typing import BinaryIO, Iterator, List, Union
+
+import PyPDF2
+
+# Gemini 프롬프트에 들어가는 CV 텍스트 최대 길이
+PROMPT_CHAR_BUDGET = int(os.getenv("CV_TEXT_BUDGET", "6000"))
+# 문서 길이와 관계없이 파싱하는 최대 페이지 수
+MAX_PAGES = int(os.getenv("CV_MAX_PAGES", "25"))
+# 우선순위가 낮은 섹션이 이만큼 연속되면 나머지도 참고문헌으로 보고 중단
+LOW_PRIORITY_STREAK = 3
+
+# 섹션 제목 키워드 (소문자, 접두어 매칭)
+PREFERRED_SECTIONS = (
+    "research", "experience", "project", "education", "skill", "interest",
+    "summary", "objective", "profile", "expertise", "연구", "경력", "학력", "기술",
+)
+LOW_PRIORITY_SECTIONS = (
+    "publication", "reference", "bibliography", "patent", "presentation",
+    "talk", "citation", "conference", "journal", "poster", "논문", "참고문헌",
+)
+
+PREFERRED, NEUTRAL, LOW = 0, 1, 2
+
+PdfSource = Union[str, bytes, BinaryIO]
+
+
+def clean_text(text: str) -> str:
+    """텍스트 전처리"""
+    # 불필요한 문자 제거
+    text = re.sub(r'[^\w\s\.\-\+\#]', ' ', text)
+    # 연속된 공백 제거
+    text = re.sub(r'\s+', ' ', text)
+    # 앞뒤 공백 제거
+    return text.strip()
+
+
+def iter_pdf_pages(source: PdfSource, max_pages: int = MAX_PAGES) -> Iterator[str]:
+    """PDF 페이지 텍스트를 한 페이지씩 추출 (필요한 만큼만 파싱)"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    reader = PyPDF2.PdfReader(source)
+    for page_num in range(min(len(reader.pages), max_pages)):
+        yield reader.pages[page_num].extract_text() or ""
+
+
+def classify_page(raw_text: str, current: int) -> int:
+    """페이지의 섹션 제목으로 우선순위 판단 (제목이 없으면 이전 섹션을 이어받음)"""
+    found = None
+    for line in raw_text.splitlines():
+        heading = line.strip().lower()
+        if not heading or len(heading) > 40:
+            continue
+        if heading.startswith(PREFERRED_SECTIONS):
+            return PREFERRED
+        if found is None and heading.startswith(LOW_PRIORITY_SECTIONS):
+            found = LOW
+    if found is not None:
+        return found
+    return current
+
+
+def extract_cv_text(source: PdfSource, char_budget: int = PROMPT_CHAR_BUDGET,
+                    max_pages: int = MAX_PAGES) -> str:
+    """예산(char_budget)만큼의 정제된 CV 텍스트를 섹션 우선순위에 따라 추출
+
+    연구/경력 등 우선 섹션 페이지를 먼저 채우고, 논문 목록·참고문헌 페이지는
+    남는 자리에만 사용한다. 우선 섹션만으로 예산이 차거나 참고문헌이
+    계속 이어지면 나머지 페이지는 파싱하지 않는다.
+    """
+    primary: List[str] = []
+    deferred: List[str] = []
+    primary_len = deferred_len = 0
+    section = NEUTRAL
+    low_streak = 0
+
+    for raw_text in iter_pdf_pages(source, max_pages):
+        section = classify_page(raw_text, section)
+        text = clean_text(raw_text)
+        if not text:
+            continue
+
+        if section == LOW:
+            low_streak += 1
+            if primary_len + deferred_len < char_budget:
+                deferred.append(text)
+                deferred_len += len(text) + 1
+        else:
+            low_streak = 0
+            primary.append(text)
+            primary_len += len(text) + 1
+
+        if primary_len >= char_budget:
+            break
+        if low_streak >= LOW_PRIORITY_STREAK and primary_len + deferred_len >= char_budget:
+            break
+
+    return " ".join(primary + deferred)[:char_budget]
@@ -0,0 +1,44 @@
+"""Standalone PDF worker process, started by ``pdf_workers.PdfWorkerPool``.
+
+Run as a script (``python pdf_worker.py <read_fd> <write_fd> <memory_limit_bytes>``)
+rather than through multiprocessing's spawn, which would re-import the
+server's ``__main__`` (and with it the SBERT model and the catalog) in
+every worker. Only the standard library is imported before the address
+space limit is applied; the PDF parser is imported after it.
+"""
+import sys
+from multiprocessing.connection import Connection
+
+try:
+    import resource
+except ImportError:  # Windows에는 resource 모듈이 없음
+    resource = None
+
+
+def main(read_fd: int, write_fd: int, memory_limit_bytes: int) -> None:
+    if resource is not None and memory_limit_bytes:
+        # 주소 공간 상한은 RSS 감시가 놓친 경우를 위한 최후 방어선
+        limit = memory_limit_bytes * 2
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    # 상한을 건 뒤에 파서를 import해야 파서 메모리도 상한 안에 들어감
+    from pdf_text import extract_cv_text
+
+    reader = Connection(read_fd, writable=False)
+    writer = Connection(write_fd, readable=False)
+    while True:
+        try:
+            data, char_budget = reader.recv()
+        except EOFError:
+            return
+        try:
+            writer.send(("ok", extract_cv_text(data, char_budget)))
+        except MemoryError:
+            writer.send(("memory", "PDF 파싱 중 메모리 한도 초과"))
+            return
+        except Exception as e:
+            writer.send(("error", str(e)))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]), int(sys.argv[2]), int(sys.argv[3]))
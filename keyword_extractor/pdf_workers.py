@@ -0,0 +1,232 @@
+import logging
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Connection
+from typing import Any, Dict, Optional
+
+from pdf_text import PROMPT_CHAR_BUDGET
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+# 워커는 서버 모듈(main.py)을 다시 import하지 않도록 독립 스크립트로 실행
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pdf_worker.py")
+
+
+class PdfParseError(Exception):
+    """PDF could not be parsed: malformed, or the job exceeded its limits"""
+
+
+class _Worker:
+    def __init__(self, memory_limit_bytes: int):
+        # 부모 -> 워커, 워커 -> 부모 파이프
+        child_read, parent_write = os.pipe()
+        parent_read, child_write = os.pipe()
+        try:
+            self.process = subprocess.Popen(
+                [sys.executable, WORKER_SCRIPT, str(child_read), str(child_write), str(memory_limit_bytes)],
+                pass_fds=(child_read, child_write),
+                stdin=subprocess.DEVNULL
+            )
+        except BaseException:
+            for fd in (parent_read, parent_write):
+                os.close(fd)
+            raise
+        finally:
+            os.close(child_read)
+            os.close(child_write)
+        self.reader = Connection(parent_read, writable=False)
+        self.writer = Connection(parent_write, readable=False)
+        self.jobs = 0
+
+    def is_alive(self) -> bool:
+        return self.process.poll() is None
+
+    def rss_bytes(self) -> int:
+        try:
+            with open(f"/proc/{self.process.pid}/statm") as f:
+                return int(f.read().split()[1]) * PAGE_SIZE
+        except (OSError, ValueError, IndexError):
+            return 0
+
+    def kill(self) -> None:
+        try:
+            self.process.kill()
+            self.process.wait(timeout=1)
+        except Exception:
+            pass
+        self.reader.close()
+        self.writer.close()
+
+
+class PdfWorkerPool:
+    """Pool of sandboxed processes that run PDF text extraction.
+
+    Workers are separate interpreters running ``pdf_worker.py`` over a
+    pair of pipes, so they only import the PDF parser. Each job gets a
+    wall-clock deadline and an RSS ceiling, polled from the parent; the
+    worker also runs under an address-space rlimit. A worker that exceeds
+    a limit or dies is killed and replaced, and the caller gets a
+    ``PdfParseError``. ``parse`` blocks, so call it from a thread pool
+    whose size does not exceed the number of workers.
+    """
+
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        timeout: Optional[float] = None,
+        memory_limit_mb: Optional[int] = None,
+        max_jobs_per_worker: Optional[int] = None,
+        poll_interval: float = 0.05
+    ):
+        self.size = size or int(os.getenv("PDF_WORKER_PROCESSES", "2"))
+        self.timeout = timeout or float(os.getenv("PDF_WORKER_TIMEOUT_S", "20"))
+        self.memory_limit = (memory_limit_mb or int(os.getenv("PDF_WORKER_MEMORY_MB", "512"))) * 1024 * 1024
+        self.max_jobs_per_worker = max_jobs_per_worker or int(os.getenv("PDF_WORKER_MAX_JOBS", "200"))
+        self.poll_interval = poll_interval
+
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._start_lock = threading.Lock()
+        self._started = False
+
+        self.jobs = 0
+        self.failed = 0
+        self.killed_timeout = 0
+        self.killed_memory = 0
+        self.crashed = 0
+        self.respawned = 0
+        self.spawn_failed = 0
+        # 살아 있는 워커 수 (재시작 실패로 줄어들면 다음 요청에서 채움)
+        self.live = 0
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._started:
+                return
+            for _ in range(self.size):
+                self._idle.put(_Worker(self.memory_limit))
+                self.live += 1
+            self._started = True
+            logger.info(f"Started {self.size} PDF workers (timeout={self.timeout}s, "
+                        f"memory={self.memory_limit // (1024 * 1024)}MB)")
+
+    def shutdown(self) -> None:
+        with self._start_lock:
+            while True:
+                try:
+                    self._idle.get_nowait().kill()
+                except queue.Empty:
+                    break
+                self.live -= 1
+            self._started = False
+
+    def _spawn(self) -> _Worker:
+        try:
+            return _Worker(self.memory_limit)
+        except Exception as e:
+            self.spawn_failed += 1
+            logger.error(f"Could not start PDF worker: {str(e)}")
+            raise PdfParseError(f"PDF 파싱 프로세스를 시작할 수 없습니다: {str(e)}")
+
+    def _acquire(self) -> _Worker:
+        """An idle worker; spawns one to make up for workers lost to failed respawns"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._start_lock:
+            if self.live < self.size:
+                worker = self._spawn()
+                self.live += 1
+                self.respawned += 1
+                return worker
+        return self._idle.get()
+
+    def _release(self, worker: _Worker, replace: bool = False) -> None:
+        """Return ``worker`` to the pool, or a fresh process in its place.
+
+        The replacement is spawned before the old worker is killed; if that
+        fails the old worker is dropped (the pool runs one short until
+        ``_acquire`` manages to spawn again) and ``PdfParseError`` is raised.
+        """
+        if not replace:
+            self._idle.put(worker)
+            return
+        try:
+            replacement = self._spawn()
+        except PdfParseError:
+            worker.kill()
+            with self._start_lock:
+                self.live -= 1
+            raise
+        worker.kill()
+        self.respawned += 1
+        self._idle.put(replacement)
+
+    def parse(self, data: bytes, char_budget: int = PROMPT_CHAR_BUDGET) -> str:
+        """Extract CV text from PDF bytes in a worker process"""
+        self.start()
+        worker = self._acquire()
+        self.jobs += 1
+        try:
+            worker.writer.send((bytes(data), char_budget))
+            status, payload = self._wait(worker)
+        except (EOFError, OSError):
+            status, payload = "crashed", "PDF 파싱 프로세스가 비정상 종료되었습니다."
+        except BaseException:
+            # 파이프 상태를 알 수 없으므로 워커를 교체
+            try:
+                self._release(worker, replace=True)
+            except PdfParseError:
+                pass
+            raise
+
+        if status == "ok":
+            worker.jobs += 1
+            try:
+                self._release(worker, replace=worker.jobs >= self.max_jobs_per_worker)
+            except PdfParseError:
+                pass  # 재활용 실패는 이번 결과와 무관 (다음 요청에서 다시 시작)
+            return payload
+
+        self.failed += 1
+        if status == "crashed":
+            self.crashed += 1
+        elif status == "timeout":
+            self.killed_timeout += 1
+        elif status == "memory":
+            self.killed_memory += 1
+        # 파싱 오류("error")는 워커가 정상이므로 그대로 재사용
+        self._release(worker, replace=status != "error")
+        raise PdfParseError(payload)
+
+    def _wait(self, worker: _Worker):
+        deadline = time.monotonic() + self.timeout
+        while not worker.reader.poll(self.poll_interval):
+            if not worker.is_alive():
+                raise EOFError
+            if time.monotonic() > deadline:
+                return "timeout", f"PDF 파싱 시간 초과 ({self.timeout:g}초)"
+            if worker.rss_bytes() > self.memory_limit:
+                return "memory", "PDF 파싱 중 메모리 한도 초과"
+        return worker.reader.recv()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "live": self.live,
+            "idle": self._idle.qsize(),
+            "timeout_s": self.timeout,
+            "memory_limit_mb": self.memory_limit // (1024 * 1024),
+            "jobs": self.jobs,
+            "failed": self.failed,
+            "killed_timeout": self.killed_timeout,
+            "killed_memory": self.killed_memory,
+            "crashed": self.crashed,
+            "respawned": self.respawned,
+            "spawn_failed": self.spawn_failed
+        }
@@ -0,0 +1,28 @@
+import argparse
+import os
+
+import uvicorn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with several uvicorn workers sharing one lab index")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("API_WORKERS", "2")))
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    # 워커들은 인덱스 디렉터리의 임베딩/카탈로그 스냅샷을 읽기 전용 mmap으로 공유한다.
+    # 처음 시작한 워커만 인덱스를 빌드하고 나머지는 잠금이 풀리면 그대로 붙는다.
+    os.environ["LAB_SHARED_INDEX"] = "1"
+    # 다른 워커가 리로드한 인덱스를 따라가도록 파일 감시를 기본으로 켬
+    os.environ.setdefault("LAB_CATALOG_WATCH_S", "5")
+
+    print(f"🚀 CV Keyword Extractor API Server Starting with {args.workers} workers...")
+    print(f"📍 API 문서: http://localhost:{args.port}/docs")
+    print(f"💡 워커별 메모리: http://localhost:{args.port}/health")
+    # main 모듈은 워커 프로세스에서만 import (이 프로세스에는 모델을 올리지 않음)
+    uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
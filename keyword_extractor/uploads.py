@@ -0,0 +1,114 @@
+import hashlib
+from typing import Dict, Optional, Tuple
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+# multipart 경계/헤더 여유분
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    """업로드 크기 제한 초과"""
+
+
+class InvalidUpload(Exception):
+    """multipart 요청이 아니거나 파일 필드가 없음"""
+
+
+class _FilePart:
+    """Collects one file field of a multipart body while it streams in"""
+
+    def __init__(self, field: str, max_bytes: int):
+        self.field = field
+        self.max_bytes = max_bytes
+        self.filename: Optional[str] = None
+        self.data = bytearray()
+        self.digest = hashlib.sha256()
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._capturing = False
+
+    def callbacks(self):
+        return {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        }
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        # 같은 이름의 파일 필드가 여러 개면 첫 번째만 사용
+        self._capturing = name == self.field and b"filename" in options and self.filename is None
+        if self._capturing:
+            self.filename = options[b"filename"].decode("utf-8", "replace")
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self._capturing:
+            return
+        if len(self.data) + (end - start) > self.max_bytes:
+            raise UploadTooLarge()
+        chunk = data[start:end]
+        self.digest.update(chunk)
+        self.data += chunk
+
+    def _on_part_end(self) -> None:
+        self._capturing = False
+
+
+async def read_file_upload(request, field: str, max_bytes: int) -> Tuple[str, bytearray, str]:
+    """multipart 요청 본문을 스트리밍으로 파싱해 (파일명, 파일 바이트, SHA-256)을 반환
+
+    FastAPI의 ``UploadFile``과 달리 본문 전체를 먼저 받아 임시 파일에
+    저장하지 않는다. Content-Length로 먼저 거르고, 받는 도중에도 본문과
+    파일 크기를 세어 한도를 넘는 즉시 ``UploadTooLarge``를 던지며, 파일
+    필드 바이트만 메모리에 한 번 모은다.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise InvalidUpload("multipart/form-data 형식으로 업로드해주세요.")
+
+    max_body = max_bytes + MULTIPART_OVERHEAD
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_body:
+        raise UploadTooLarge()
+
+    part = _FilePart(field, max_bytes)
+    parser = MultipartParser(boundary, part.callbacks())
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_body:
+                raise UploadTooLarge()
+            parser.write(chunk)
+        parser.finalize()
+    except ValueError as e:  # MultipartParseError
+        raise InvalidUpload(f"multipart 본문을 해석할 수 없습니다: {str(e)}")
+
+    if part.filename is None:
+        raise InvalidUpload(f"'{field}' 파일 필드가 없습니다.")
+    return part.filename, part.data, part.digest.hexdigest()
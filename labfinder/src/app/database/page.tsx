@@ -1,47 +1,135 @@
 'use client';
 
 import Link from "next/link";
-import { useState, useMemo } from "react";
+import { useState, useEffect, useMemo, type ReactNode } from "react";
 import { motion, AnimatePresence } from "framer-motion";
-import { FiSearch, FiFilter, FiChevronDown, FiChevronUp, FiExternalLink } from "react-icons/fi";
-import { labs } from "./labsData";
-import { useRouter } from "next/navigation";
+import { FiSearch, FiFilter, FiChevronDown, FiChevronUp } from "react-icons/fi";
 
-// Lab 타입 정의
-type Lab = {
+const SEARCH_API_URL = "http://localhost:8000/labs/search";
+const PAGE_SIZE = 20;
+// 입력이 멈춘 뒤 검색 요청을 보내기까지 대기 시간 (ms)
+const SEARCH_DEBOUNCE_MS = 250;
+
+// 검색 결과의 Lab 타입 (소개글 전체 대신 하이라이트된 스니펫)
+type LabSummary = {
   id: string;
   name: string;
   major: string;
   university: string;
   keywords: string;
-  introduction: string;
+  snippet: string;
+  highlights: [number, number][];
+};
+
+type FacetValue = {
+  value: string;
+  count: number;
+};
+
+type SearchResponse = {
+  success: boolean;
+  total: number;
+  page: number;
+  page_size: number;
+  labs: LabSummary[];
+  facets: {
+    universities: FacetValue[];
+    majors: FacetValue[];
+  };
 };
 
+// 스니펫에서 검색어와 일치하는 부분 강조
+function HighlightedText({ text, highlights }: { text: string; highlights: [number, number][] }) {
+  const parts: ReactNode[] = [];
+  let cursor = 0;
+  highlights.forEach(([start, end], index) => {
+    if (start > cursor) {
+      parts.push(<span key={`t${index}`}>{text.slice(cursor, start)}</span>);
+    }
+    parts.push(
+      <mark key={`m${index}`} className="bg-yellow-100 text-gray-900 rounded px-0.5">
+        {text.slice(start, end)}
+      </mark>
+    );
+    cursor = end;
+  });
+  parts.push(<span key="rest">{text.slice(cursor)}</span>);
+  return <>{parts}</>;
+}
+
 export default function Database() {
   const [expandedLab, setExpandedLab] = useState<string | null>(null);
   const [selectedUniversity, setSelectedUniversity] = useState<string>("All");
   const [selectedMajor, setSelectedMajor] = useState<string>("All");
   const [searchQuery, setSearchQuery] = useState("");
+  const [debouncedQuery, setDebouncedQuery] = useState("");
   const [showFilters, setShowFilters] = useState(false);
-  const router = useRouter();
+  const [page, setPage] = useState(1);
+  const [results, setResults] = useState<SearchResponse | null>(null);
+  const [isLoading, setIsLoading] = useState(true);
+  const [error, setError] = useState<string | null>(null);
 
-  // 중복 없는 대학교 목록 만들기
-  const universities = useMemo(() => 
-    ["All", ...Array.from(new Set(labs.map(lab => lab.university)))],
-    []
-  );
-  
-  // 선택된 대학에 따른 학과 목록 필터링
+  // 키 입력마다 요청하지 않도록 검색어 디바운스
+  useEffect(() => {
+    const timer = setTimeout(() => setDebouncedQuery(searchQuery.trim()), SEARCH_DEBOUNCE_MS);
+    return () => clearTimeout(timer);
+  }, [searchQuery]);
+
+  // 검색 조건이 바뀌면 첫 페이지로
+  useEffect(() => {
+    setPage(1);
+  }, [debouncedQuery, selectedUniversity, selectedMajor]);
+
+  // 서버에서 검색 결과와 패싯 가져오기 (이전 요청은 취소)
+  useEffect(() => {
+    const controller = new AbortController();
+    const params = new URLSearchParams({
+      q: debouncedQuery,
+      page: String(page),
+      page_size: String(PAGE_SIZE),
+    });
+    if (selectedUniversity !== "All") params.set("university", selectedUniversity);
+    if (selectedMajor !== "All") params.set("major", selectedMajor);
+
+    setIsLoading(true);
+    fetch(`${SEARCH_API_URL}?${params}`, { signal: controller.signal })
+      .then((response) => {
+        if (!response.ok) {
+          throw new Error("연구실 목록을 불러오는데 실패했습니다.");
+        }
+        return response.json();
+      })
+      .then((data: SearchResponse) => {
+        setResults(data);
+        setError(null);
+        setIsLoading(false);
+      })
+      .catch((err) => {
+        if (err.name === "AbortError") return;
+        console.error("연구실 검색 중 오류 발생:", err);
+        setError(err.message);
+        setIsLoading(false);
+      });
+    return () => controller.abort();
+  }, [debouncedQuery, selectedUniversity, selectedMajor, page]);
+
+  // 검색 결과 기준 대학교 목록 (선택된 값은 결과가 없어도 유지)
+  const universities = useMemo(() => {
+    const values = (results?.facets.universities ?? []).map((facet) => facet.value);
+    if (selectedUniversity !== "All" && !values.includes(selectedUniversity)) {
+      values.unshift(selectedUniversity);
+    }
+    return ["All", ...values];
+  }, [results, selectedUniversity]);
+
+  // 선택된 대학에 따른 학과 목록
   const majors = useMemo(() => {
-    if (selectedUniversity === "All") {
-      return ["All", ...Array.from(new Set(labs.map(lab => lab.major)))];
+    const values = (results?.facets.majors ?? []).map((facet) => facet.value);
+    if (selectedMajor !== "All" && !values.includes(selectedMajor)) {
+      values.unshift(selectedMajor);
     }
-    return ["All", ...Array.from(new Set(
-      labs
-        .filter(lab => lab.university === selectedUniversity)
-        .map(lab => lab.major)
-    ))];
-  }, [selectedUniversity]);
+    return ["All", ...values];
+  }, [results, selectedMajor]);
 
   // 대학이 변경될 때 학과 필터 초기화
   const handleUniversityChange = (university: string) => {
@@ -49,19 +137,9 @@ export default function Database() {
     setSelectedMajor("All");
   };
 
-  // 검색어, 대학교, 학과별 필터링된 랩 목록
-  const filteredLabs = useMemo(() => {
-    return labs.filter(lab => {
-      const universityMatch = selectedUniversity === "All" || lab.university === selectedUniversity;
-      const majorMatch = selectedMajor === "All" || lab.major === selectedMajor;
-      const searchMatch = searchQuery === "" || 
-        lab.name.toLowerCase().includes(searchQuery.toLowerCase()) ||
-        lab.keywords.toLowerCase().includes(searchQuery.toLowerCase()) ||
-        lab.introduction.toLowerCase().includes(searchQuery.toLowerCase());
-      
-      return universityMatch && majorMatch && searchMatch;
-    });
-  }, [selectedUniversity, selectedMajor, searchQuery]);
+  const filteredLabs = results?.labs ?? [];
+  const total = results?.total ?? 0;
+  const totalPages = Math.max(1, Math.ceil(total / PAGE_SIZE));
 
   return (
     <div className="min-h-screen bg-gray-50 py-12">
@@ -163,8 +241,11 @@ export default function Database() {
           {/* Results Count */}
           <div className="mb-6">
             <p className="text-gray-600">
-              Showing {filteredLabs.length} research labs
+              {isLoading && !results ? "Loading research labs..." : `Showing ${total} research labs`}
             </p>
+            {error && (
+              <p className="text-red-600 mt-2">{error}</p>
+            )}
           </div>
 
           {/* Labs Grid */}
@@ -241,7 +322,7 @@ export default function Database() {
                           <div className="mb-6">
                             <h3 className="text-sm font-semibold text-gray-500 mb-3">Introduction</h3>
                             <p className="text-gray-700 whitespace-pre-line leading-relaxed">
-                              {lab.introduction}
+                              <HighlightedText text={lab.snippet} highlights={lab.highlights} />
                             </p>
                 </div>
                           <Link
@@ -259,8 +340,31 @@ export default function Database() {
             </AnimatePresence>
           </div>
 
+          {/* Pagination */}
+          {total > PAGE_SIZE && (
+            <div className="flex justify-center items-center gap-4 mt-8">
+              <button
+                onClick={() => setPage(page - 1)}
+                disabled={page <= 1 || isLoading}
+                className="px-4 py-2 rounded-lg border border-gray-300 text-gray-700 hover:bg-gray-100 disabled:opacity-50 disabled:cursor-not-allowed"
+              >
+                Previous
+              </button>
+              <span className="text-gray-600">
+                Page {page} of {totalPages}
+              </span>
+              <button
+                onClick={() => setPage(page + 1)}
+                disabled={page >= totalPages || isLoading}
+                className="px-4 py-2 rounded-lg border border-gray-300 text-gray-700 hover:bg-gray-100 disabled:opacity-50 disabled:cursor-not-allowed"
+              >
+                Next
+              </button>
+            </div>
+          )}
+
           {/* No Results Message */}
-          {filteredLabs.length === 0 && (
+          {!isLoading && !error && filteredLabs.length === 0 && (
             <motion.div
               initial={{ opacity: 0 }}
               animate={{ opacity: 1 }}
@@ -5,21 +5,54 @@ import { useEffect, useState } from "react";
 import Link from "next/link";
 import { useRouter } from "next/navigation";
 
+// 추천 목록은 요약만 보여주므로 compact 응답(소개글 대신 스니펫)의 필드만 요청
 interface Lab {
   id: string;
   name: string;
   university: string;
   major: string;
   keywords: string;
-  introduction: string;
+  snippet: string;
   similarity_score: number;
-  match_count: number;
-  matching_keywords: string[];
+  match_count?: number;
+  matching_keywords?: string[];
+}
+
+const PAGE_SIZE = 10;
+// 상세 링크는 id로 만들므로 slug는 요청하지 않음
+const LAB_FIELDS = ["id", "name", "major", "university", "keywords", "snippet", "similarity_score"];
+
+async function fetchRecommendationPage(keywords: string[], cursor: string | null) {
+  const response = await fetch("http://localhost:8000/recommend-labs", {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({
+      keywords,
+      fields: LAB_FIELDS,
+      page_size: PAGE_SIZE,
+      ...(cursor ? { cursor } : {}),
+    }),
+  });
+
+  if (!response.ok) {
+    throw new Error("추천 목록을 불러오는데 실패했습니다.");
+  }
+
+  const data = await response.json();
+  if (!data.success) {
+    throw new Error("API에서 오류를 반환했습니다.");
+  }
+  return data as { recommendations: Lab[]; next_cursor: string | null };
 }
 
 export default function Recommend() {
   const [recommendedLabs, setRecommendedLabs] = useState<Lab[]>([]);
   const [isLoading, setIsLoading] = useState(true);
+  const [cvKeywords, setCvKeywords] = useState<string[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const router = useRouter();
 
   useEffect(() => {
@@ -32,29 +65,12 @@ export default function Recommend() {
       }
 
       try {
-        const cvKeywords = JSON.parse(storedKeywords);
-        
-        const response = await fetch("http://localhost:8000/recommend-labs", {
-          method: "POST",
-          headers: {
-            "Content-Type": "application/json",
-          },
-          body: JSON.stringify({
-            keywords: cvKeywords,
-            top_n: 10, // 필요에 따라 이 값을 조정할 수 있습니다.
-          }),
-        });
-
-        if (!response.ok) {
-          throw new Error("추천 목록을 불러오는데 실패했습니다.");
-        }
+        const keywords = JSON.parse(storedKeywords);
+        setCvKeywords(keywords);
 
-        const data = await response.json();
-        if (data.success) {
-          setRecommendedLabs(data.recommendations);
-        } else {
-          throw new Error("API에서 오류를 반환했습니다.");
-        }
+        const data = await fetchRecommendationPage(keywords, null);
+        setRecommendedLabs(data.recommendations);
+        setNextCursor(data.next_cursor);
       } catch (error) {
         console.error("추천을 받아오는 중 오류 발생:", error);
       } finally {
@@ -65,6 +81,22 @@ export default function Recommend() {
     fetchRecommendations();
   }, [router]);
 
+  // 다음 페이지는 서버에 캐시된 순위에서 잘라오므로 다시 계산하지 않음
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setIsLoadingMore(true);
+    try {
+      const data = await fetchRecommendationPage(cvKeywords, nextCursor);
+      setRecommendedLabs((labs) => [...labs, ...data.recommendations]);
+      setNextCursor(data.next_cursor);
+    } catch (error) {
+      console.error("추천을 받아오는 중 오류 발생:", error);
+      setNextCursor(null);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   if (isLoading) {
     return (
       <div className="container mx-auto px-4 py-8">
@@ -103,6 +135,7 @@ export default function Recommend() {
                     </span>
                   </div>
                   <p className="text-gray-600">{lab.university} - {lab.major}</p>
+                  <p className="mt-1 text-sm text-gray-500">{lab.snippet}</p>
                   <div className="mt-2 flex flex-wrap gap-1">
                     {lab.keywords.split(", ").slice(0, 3).map((keyword: string, index: number) => (
                       <span
@@ -139,6 +172,17 @@ export default function Recommend() {
               </div>
             </div>
           ))}
+          {nextCursor && (
+            <div className="text-center">
+              <button
+                onClick={loadMore}
+                disabled={isLoadingMore}
+                className="px-4 py-2 bg-gray-100 text-gray-700 rounded hover:bg-gray-200 disabled:opacity-50"
+              >
+                {isLoadingMore ? "Loading..." : "Load more"}
+              </button>
+            </div>
+          )}
         </div>
       )}
     </div>